@@ -0,0 +1,185 @@
+"""Baseline schema
+
+Creates the tables the app used to create with `Base.metadata.create_all`,
+plus the statement job/cache columns and the monthly rollup table. Every step
+is skipped when the table or column already exists, so databases created by
+`create_all` can be upgraded in place.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+STATEMENT_COLUMNS = [
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('progress', sa.Integer(), nullable=True),
+    sa.Column('transactions_count', sa.Integer(), nullable=True),
+    sa.Column('error_message', sa.Text(), nullable=True),
+    sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('pdf_content', sa.LargeBinary(), nullable=True),
+    sa.Column('content_hash', sa.String(length=64), nullable=True),
+]
+
+
+def _month_key(dialect_name: str, date):
+    """"YYYY-MM" of a timestamp column, as app.services.rollups.month_key computes it"""
+    if dialect_name == 'postgresql':
+        return sa.func.to_char(date, 'YYYY-MM')
+    if dialect_name == 'sqlite':
+        return sa.func.strftime('%Y-%m', date)
+    if dialect_name in ('mysql', 'mariadb'):
+        return sa.func.date_format(date, '%Y-%m')
+    return sa.func.concat(
+        sa.cast(sa.extract('year', date), sa.String), '-',
+        sa.func.lpad(sa.cast(sa.extract('month', date), sa.String), 2, '0')
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    if 'users' not in tables:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('email', sa.String(), nullable=False),
+            sa.Column('hashed_password', sa.String(), nullable=False),
+            sa.Column('full_name', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index('ix_users_id', 'users', ['id'])
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    if 'statements' not in tables:
+        op.create_table(
+            'statements',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('filename', sa.String(), nullable=False),
+            sa.Column('uploaded_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column('processed', sa.Boolean(), nullable=True),
+            *[column.copy() for column in STATEMENT_COLUMNS],
+        )
+        op.create_index('ix_statements_id', 'statements', ['id'])
+    else:
+        existing = {column['name'] for column in inspector.get_columns('statements')}
+        for column in STATEMENT_COLUMNS:
+            if column.name not in existing:
+                op.add_column('statements', column.copy())
+    statement_indexes = {index['name'] for index in inspector.get_indexes('statements')} if 'statements' in tables else set()
+    if 'ix_statements_content_hash' not in statement_indexes:
+        op.create_index('ix_statements_content_hash', 'statements', ['content_hash'])
+
+    if 'transactions' not in tables:
+        op.create_table(
+            'transactions',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('statement_id', sa.Integer(), sa.ForeignKey('statements.id'), nullable=False),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('date', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('description', sa.String(), nullable=False),
+            sa.Column('amount', sa.Float(), nullable=False),
+            sa.Column('transaction_type', sa.String(), nullable=False),
+            sa.Column('category', sa.String(), nullable=True),
+            sa.Column('original_text', sa.Text(), nullable=True),
+        )
+        op.create_index('ix_transactions_id', 'transactions', ['id'])
+
+    if 'goals' not in tables:
+        op.create_table(
+            'goals',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('name', sa.String(), nullable=False),
+            sa.Column('target_amount', sa.Float(), nullable=False),
+            sa.Column('current_amount', sa.Float(), nullable=True),
+            sa.Column('deadline', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column('active', sa.Boolean(), nullable=True),
+        )
+        op.create_index('ix_goals_id', 'goals', ['id'])
+
+    if 'fixed_expenses' not in tables:
+        op.create_table(
+            'fixed_expenses',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('name', sa.String(), nullable=False),
+            sa.Column('amount', sa.Float(), nullable=False),
+            sa.Column('category', sa.String(), nullable=False),
+            sa.Column('recurring', sa.String(), nullable=True),
+            sa.Column('day_of_month', sa.Integer(), nullable=True),
+            sa.Column('last_paid_date', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index('ix_fixed_expenses_id', 'fixed_expenses', ['id'])
+    else:
+        existing = {column['name'] for column in inspector.get_columns('fixed_expenses')}
+        if 'last_paid_date' not in existing:
+            op.add_column('fixed_expenses', sa.Column('last_paid_date', sa.DateTime(timezone=True), nullable=True))
+
+    if 'monthly_category_rollups' not in tables:
+        op.create_table(
+            'monthly_category_rollups',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('month', sa.String(length=7), nullable=False),
+            sa.Column('category', sa.String(), nullable=False),
+            sa.Column('transaction_type', sa.String(), nullable=False),
+            sa.Column('total', sa.Float(), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.UniqueConstraint('user_id', 'month', 'category', 'transaction_type', name='uq_monthly_category_rollup'),
+        )
+        op.create_index('ix_monthly_category_rollups_id', 'monthly_category_rollups', ['id'])
+
+    # The dashboard and recommendations read whole months from the rollups, so
+    # transactions stored before this table existed are aggregated into it now
+    # (same grouping as app.services.rollups.rebuild_rollups)
+    bind = op.get_bind()
+    if bind.execute(sa.text('SELECT 1 FROM monthly_category_rollups LIMIT 1')).first() is None:
+        transactions = sa.table(
+            'transactions',
+            sa.column('user_id', sa.Integer()), sa.column('date', sa.DateTime(timezone=True)),
+            sa.column('category', sa.String()), sa.column('transaction_type', sa.String()),
+            sa.column('amount', sa.Float()), sa.column('id', sa.Integer()),
+        )
+        rollups = sa.table(
+            'monthly_category_rollups',
+            sa.column('user_id'), sa.column('month'), sa.column('category'),
+            sa.column('transaction_type'), sa.column('total'), sa.column('count'),
+        )
+        month = _month_key(bind.dialect.name, transactions.c.date)
+        category = sa.func.coalesce(transactions.c.category, '')
+        op.execute(rollups.insert().from_select(
+            ['user_id', 'month', 'category', 'transaction_type', 'total', 'count'],
+            sa.select(
+                transactions.c.user_id, month, category, transactions.c.transaction_type,
+                sa.func.sum(transactions.c.amount), sa.func.count(transactions.c.id),
+            ).group_by(transactions.c.user_id, month, category, transactions.c.transaction_type)
+        ))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('monthly_category_rollups')
+    op.drop_table('fixed_expenses')
+    op.drop_table('goals')
+    op.drop_table('transactions')
+    op.drop_table('statements')
+    op.drop_table('users')
@@ -0,0 +1,44 @@
+"""Composite indexes on transactions
+
+Every hot transactions query filters by user and a date range, often by type
+or category as well; deletes and CSV export filter by statement.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = {
+    'ix_transactions_user_id_date': ['user_id', 'date'],
+    'ix_transactions_user_id_type_date': ['user_id', 'transaction_type', 'date'],
+    'ix_transactions_user_id_category_date': ['user_id', 'category', 'date'],
+    'ix_transactions_statement_id': ['statement_id'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # create_all already builds these on fresh databases
+    existing = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('transactions')}
+    for name, columns in INDEXES.items():
+        if name not in existing:
+            op.create_index(name, 'transactions', columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in reversed(list(INDEXES)):
+        op.drop_index(name, table_name='transactions')
@@ -0,0 +1,35 @@
+"""Ingestion claim on statements
+
+`claimed_at` records when an ingestion job took a statement, so server
+processes requeueing pending statements at startup parse each one once and
+only take over "processing" statements whose job went away.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # create_all already adds it on fresh databases
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('statements')}
+    if 'claimed_at' not in existing:
+        op.add_column('statements', sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('statements', 'claimed_at')
@@ -1,35 +1,131 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, statements, transactions, goals, fixed_expenses, recommendations
-from app.database import engine, Base
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
-app = FastAPI(title="FinAIce API", version="1.0.0")
-
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000"],  # Next.js default port
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
-app.include_router(statements.router, prefix="/api/statements", tags=["statements"])
-app.include_router(transactions.router, prefix="/api/transactions", tags=["transactions"])
-app.include_router(goals.router, prefix="/api/goals", tags=["goals"])
-app.include_router(fixed_expenses.router, prefix="/api/fixed-expenses", tags=["fixed-expenses"])
-app.include_router(recommendations.router, prefix="/api/recommendations", tags=["recommendations"])
-
-@app.get("/")
-async def root():
-    return {"message": "FinAIce API is running"}
-
-@app.get("/api/health")
-async def health():
-    return {"status": "healthy"}
-
+import asyncio
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.middleware.cors import CORSMiddleware
+from app.routers import auth, statements, transactions, goals, fixed_expenses, recommendations
+from app.database import SessionLocal, async_engine, engine, pool_stats, Base
+from app.services.job_queue import get_ingestion_queue, requeue_pending_statements, shutdown_ingestion_queue
+from app.profiling import PROFILING_ENABLED, ProfilingMiddleware
+from app.services.metrics import METRICS_ENABLED, gauge_lines, histogram_lines, registry
+from app.services.parse_cache import get_parse_cache
+from app.services.rollups import ROLLUPS_ENABLED, backfill_rollups
+
+# Create database tables
+Base.metadata.create_all(bind=engine)
+
+app = FastAPI(title="FinAIce API", version="1.0.0")
+
+# CORS middleware
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:3000"],  # Next.js default port
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Opt-in cProfile capture of sampled or admin-flagged requests
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+@app.on_event("startup")
+async def start_ingestion():
+    # Start the parse workers now so the first upload doesn't pay for spawning
+    # processes and importing pdfplumber
+    parse_pool = get_ingestion_queue().parse_pool
+    if parse_pool is not None:
+        workers = await asyncio.to_thread(parse_pool.warm)
+        print(f"Parse pool ready: {workers} worker processes")
+    # Resume statements that were still queued when the server stopped
+    requeue_pending_statements()
+
+@app.on_event("startup")
+async def fill_rollups():
+    # Transactions stored before the rollup table existed would be missing from
+    # every whole-month dashboard and recommendation sum
+    if ROLLUPS_ENABLED and await asyncio.to_thread(_backfill_rollups):
+        print("Monthly rollups built from existing transactions")
+
+def _backfill_rollups() -> bool:
+    db = SessionLocal()
+    try:
+        return backfill_rollups(db)
+    finally:
+        db.close()
+
+@app.on_event("shutdown")
+async def stop_ingestion():
+    shutdown_ingestion_queue(wait=False)
+
+@app.on_event("shutdown")
+async def close_database():
+    # Pooled async connections (aiosqlite runs one thread each) must be closed explicitly
+    if async_engine is not None:
+        await async_engine.dispose()
+
+# Include routers
+app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
+app.include_router(statements.router, prefix="/api/statements", tags=["statements"])
+app.include_router(transactions.router, prefix="/api/transactions", tags=["transactions"])
+app.include_router(goals.router, prefix="/api/goals", tags=["goals"])
+app.include_router(fixed_expenses.router, prefix="/api/fixed-expenses", tags=["fixed-expenses"])
+app.include_router(recommendations.router, prefix="/api/recommendations", tags=["recommendations"])
+
+@app.get("/")
+async def root():
+    return {"message": "FinAIce API is running"}
+
+@app.get("/api/health")
+async def health():
+    return {"status": "healthy"}
+
+@app.get("/api/health/pool")
+async def pool_health():
+    """Connection pool usage, checkout wait times and timeouts per engine (sync, async)"""
+    return {name: stats.snapshot() for name, stats in pool_stats.items()}
+
+def _runtime_metrics():
+    """Scrape-time gauges: connection pools, parse cache, parse pool and ingestion queue"""
+    lines = []
+    pools = list(pool_stats.items())
+    snapshots = {name: stats.snapshot() for name, stats in pools}
+    for metric, key, documentation in (
+        ("finaice_db_pool_in_use", "in_use", "Connections currently checked out"),
+        ("finaice_db_pool_peak_in_use", "peak_in_use", "Most connections checked out at once"),
+        ("finaice_db_pool_size", "pool_size", "Configured pool size"),
+    ):
+        lines += gauge_lines(metric, documentation, [({"engine": name}, snapshot[key]) for name, snapshot in snapshots.items()])
+    lines += gauge_lines(
+        "finaice_db_pool_checkout_timeouts_total", "Checkouts that hit the pool timeout",
+        [({"engine": name}, snapshot["timeouts"]) for name, snapshot in snapshots.items()], type_name="counter"
+    )
+    lines += ["# HELP finaice_db_pool_checkout_seconds Time spent waiting for a pooled connection",
+              "# TYPE finaice_db_pool_checkout_seconds histogram"]
+    for name, stats in pools:
+        lines += histogram_lines("finaice_db_pool_checkout_seconds", stats.checkout_seconds, {"engine": name})
+
+    cache = get_parse_cache().stats()
+    lines += gauge_lines(
+        "finaice_parse_cache_lookups_total", "Parse cache lookups by result",
+        [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])], type_name="counter"
+    )
+    lines += gauge_lines("finaice_parse_cache_bytes", "Bytes held by the parse cache", [({}, cache["bytes"])])
+    lines += gauge_lines("finaice_ingestion_queue_pending", "Statements waiting for an ingestion worker",
+                         [({}, get_ingestion_queue().pending())])
+    parse_pool = get_ingestion_queue().parse_pool
+    if parse_pool is not None:
+        pool = parse_pool.stats()
+        lines += gauge_lines("finaice_parse_pool_workers", "Parse worker processes", [({}, pool["workers"])])
+        lines += gauge_lines("finaice_parse_pool_timeouts_total", "Parses killed after PARSE_TIMEOUT_SECONDS",
+                             [({}, pool["timeouts"])], type_name="counter")
+        lines += gauge_lines("finaice_parse_pool_recycles_total", "Times the parse pool was replaced (timeouts, crashed workers)",
+                             [({}, pool["recycles"])], type_name="counter")
+    return lines
+
+if METRICS_ENABLED:
+    registry.add_collector(_runtime_metrics)
+
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    async def metrics():
+        """Prometheus text exposition of the ingestion, pool and cache metrics"""
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
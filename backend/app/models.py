@@ -1,80 +1,107 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
-from app.database import Base
-
-class User(Base):
-    __tablename__ = "users"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, unique=True, index=True, nullable=False)
-    hashed_password = Column(String, nullable=False)
-    full_name = Column(String)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    
-    # Relationships
-    statements = relationship("Statement", back_populates="owner")
-    goals = relationship("Goal", back_populates="owner")
-    fixed_expenses = relationship("FixedExpense", back_populates="owner")
-
-class Statement(Base):
-    __tablename__ = "statements"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    filename = Column(String, nullable=False)
-    uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
-    processed = Column(Boolean, default=False)
-    
-    # Relationships
-    owner = relationship("User", back_populates="statements")
-    transactions = relationship("Transaction", back_populates="statement")
-
-class Transaction(Base):
-    __tablename__ = "transactions"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    statement_id = Column(Integer, ForeignKey("statements.id"), nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    date = Column(DateTime(timezone=True), nullable=False)
-    description = Column(String, nullable=False)
-    amount = Column(Float, nullable=False)
-    transaction_type = Column(String, nullable=False)  # "income" or "expense"
-    category = Column(String)  # Food, Transportation, etc.
-    original_text = Column(Text)  # Original text from PDF
-    
-    # Relationships
-    statement = relationship("Statement", back_populates="transactions")
-
-class Goal(Base):
-    __tablename__ = "goals"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    name = Column(String, nullable=False)
-    target_amount = Column(Float, nullable=False)
-    current_amount = Column(Float, default=0.0)
-    deadline = Column(DateTime(timezone=True))
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    active = Column(Boolean, default=True)
-    
-    # Relationships
-    owner = relationship("User", back_populates="goals")
-
-class FixedExpense(Base):
-    __tablename__ = "fixed_expenses"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    name = Column(String, nullable=False)
-    amount = Column(Float, nullable=False)
-    category = Column(String, nullable=False)
-    recurring = Column(String, default="monthly")  # monthly, weekly, yearly
-    day_of_month = Column(Integer, nullable=True)  # Day of month for monthly expenses (1-31)
-    last_paid_date = Column(DateTime(timezone=True), nullable=True)  # Last time this was marked as paid
-    active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    
-    # Relationships
-    owner = relationship("User", back_populates="fixed_expenses")
-
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, LargeBinary, UniqueConstraint, Index
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.sql import func
+from app.database import Base
+
+class User(Base):
+    __tablename__ = "users"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    email = Column(String, unique=True, index=True, nullable=False)
+    hashed_password = Column(String, nullable=False)
+    full_name = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    statements = relationship("Statement", back_populates="owner")
+    goals = relationship("Goal", back_populates="owner")
+    fixed_expenses = relationship("FixedExpense", back_populates="owner")
+
+class Statement(Base):
+    __tablename__ = "statements"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    filename = Column(String, nullable=False)
+    uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed = Column(Boolean, default=False)
+    status = Column(String, default="pending")  # pending, processing, completed, failed
+    progress = Column(Integer, default=0)  # 0-100, updated by the ingestion worker
+    transactions_count = Column(Integer, default=0)
+    error_message = Column(Text, nullable=True)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+    pdf_content = deferred(Column(LargeBinary, nullable=True))  # Raw upload, cleared once processed
+    content_hash = Column(String(64), index=True, nullable=True)  # SHA-256 of the uploaded PDF
+    claimed_at = Column(DateTime(timezone=True), nullable=True)  # When the running ingestion job took it
+    
+    # Relationships
+    owner = relationship("User", back_populates="statements")
+    transactions = relationship("Transaction", back_populates="statement")
+
+class Transaction(Base):
+    __tablename__ = "transactions"
+    __table_args__ = (
+        # Every hot query filters by user and a date range, often by type or category too
+        Index("ix_transactions_user_id_date", "user_id", "date"),
+        Index("ix_transactions_user_id_type_date", "user_id", "transaction_type", "date"),
+        Index("ix_transactions_user_id_category_date", "user_id", "category", "date"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    statement_id = Column(Integer, ForeignKey("statements.id"), nullable=False, index=True)  # Deletes and CSV export
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    date = Column(DateTime(timezone=True), nullable=False)
+    description = Column(String, nullable=False)
+    amount = Column(Float, nullable=False)
+    transaction_type = Column(String, nullable=False)  # "income" or "expense"
+    category = Column(String)  # Food, Transportation, etc.
+    original_text = Column(Text)  # Original text from PDF
+    
+    # Relationships
+    statement = relationship("Statement", back_populates="transactions")
+
+class Goal(Base):
+    __tablename__ = "goals"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    name = Column(String, nullable=False)
+    target_amount = Column(Float, nullable=False)
+    current_amount = Column(Float, default=0.0)
+    deadline = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    active = Column(Boolean, default=True)
+    
+    # Relationships
+    owner = relationship("User", back_populates="goals")
+
+class FixedExpense(Base):
+    __tablename__ = "fixed_expenses"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    name = Column(String, nullable=False)
+    amount = Column(Float, nullable=False)
+    category = Column(String, nullable=False)
+    recurring = Column(String, default="monthly")  # monthly, weekly, yearly
+    day_of_month = Column(Integer, nullable=True)  # Day of month for monthly expenses (1-31)
+    last_paid_date = Column(DateTime(timezone=True), nullable=True)  # Last time this was marked as paid
+    active = Column(Boolean, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    owner = relationship("User", back_populates="fixed_expenses")
+
+class MonthlyCategoryRollup(Base):
+    __tablename__ = "monthly_category_rollups"
+    __table_args__ = (
+        UniqueConstraint("user_id", "month", "category", "transaction_type", name="uq_monthly_category_rollup"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    month = Column(String(7), nullable=False)  # "YYYY-MM"
+    category = Column(String, nullable=False, default="")  # "" for uncategorized transactions
+    transaction_type = Column(String, nullable=False)
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,113 @@
+import asyncio
+import cProfile
+import hmac
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Optional
+from dotenv import load_dotenv
+from app.services.metrics import Counter
+
+load_dotenv()
+
+# Opt-in request profiling: a random sample of requests, plus any request sent with
+# `X-Profile-Request: <PROFILING_ADMIN_TOKEN>` (empty token = header mode off)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0.0"))
+PROFILING_ADMIN_TOKEN = os.getenv("PROFILING_ADMIN_TOKEN", "")
+PROFILING_DIR = os.getenv("PROFILING_DIR", ".profiles")
+PROFILING_MAX_PER_ROUTE = int(os.getenv("PROFILING_MAX_PER_ROUTE", "50"))  # Oldest .prof files are deleted
+
+PROFILE_HEADER = b"x-profile-request"
+ROUTE_SLUG_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+PROFILED_REQUESTS = Counter(
+    "finaice_profiled_requests_total",
+    "Requests profiled by trigger, or skipped because another profile was running",
+    ("trigger",),
+)
+
+
+def route_slug(method: str, path: str) -> str:
+    """Directory name for a route template, e.g. GET /api/goals/{goal_id} -> GET_api_goals_goal_id"""
+    return f"{method}_{ROUTE_SLUG_RE.sub('_', path).strip('_') or 'root'}"
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware running cProfile around sampled or admin-flagged requests.
+
+    Profiles are written as `<PROFILING_DIR>/<route>/<timestamp>-<id>.prof`, open them
+    with `python -m pstats` or a flamegraph viewer such as snakeviz. The profiler is
+    process-wide on the event loop thread, so only one request is profiled at a time
+    and work of concurrent requests on the loop shows up in the same profile. Code run
+    in worker threads (sync DB_MODE handlers, bcrypt) is not captured.
+    """
+
+    def __init__(self, app, sample_rate: float = PROFILING_SAMPLE_RATE, admin_token: str = PROFILING_ADMIN_TOKEN,
+                 directory: str = PROFILING_DIR, max_per_route: int = PROFILING_MAX_PER_ROUTE):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.admin_token = admin_token.encode()
+        self.directory = directory
+        self.max_per_route = max_per_route
+        self._busy = threading.Lock()
+
+    def _trigger(self, scope) -> Optional[str]:
+        if self.admin_token:
+            for name, value in scope.get("headers", ()):
+                if name == PROFILE_HEADER:
+                    if hmac.compare_digest(value, self.admin_token):
+                        return "header"
+                    break
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trigger = self._trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            PROFILED_REQUESTS.inc(trigger="busy")
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+        async def send_with_profile_id(message):
+            # Tell the admin which file holds their profile
+            if trigger == "header" and message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", ())) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_with_profile_id)
+            finally:
+                profiler.disable()
+        finally:
+            self._busy.release()
+            PROFILED_REQUESTS.inc(trigger=trigger)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or scope.get("path", "")
+            directory = os.path.join(self.directory, route_slug(scope.get("method", ""), path))
+            await asyncio.to_thread(self._save, profiler, directory, profile_id)
+
+    def _save(self, profiler: cProfile.Profile, directory: str, profile_id: str) -> None:
+        try:
+            os.makedirs(directory, exist_ok=True)
+            profiler.dump_stats(os.path.join(directory, f"{profile_id}.prof"))
+            files = sorted(name for name in os.listdir(directory) if name.endswith(".prof"))
+            for name in files[:max(0, len(files) - self.max_per_route)]:
+                os.remove(os.path.join(directory, name))
+        except OSError as e:
+            print(f"Could not save request profile {profile_id}: {e}")
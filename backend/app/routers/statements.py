@@ -1,171 +1,243 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import Statement, Transaction, User
-from app.schemas import StatementResponse, TransactionResponse
-from app.auth import get_current_user
-from app.services.pdf_parser import PDFParser
-from app.services.ai_categorizer import AICategorizer
-from typing import List
-import csv
-import io
-
-router = APIRouter()
-
-@router.post("/upload", response_model=StatementResponse, status_code=status.HTTP_201_CREATED)
-async def upload_statement(
-    file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Upload and process a bank statement PDF"""
-    if not file.filename.endswith('.pdf'):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Only PDF files are supported"
-        )
-    
-    # Read PDF file
-    pdf_content = await file.read()
-    
-    # Create statement record
-    db_statement = Statement(
-        user_id=current_user.id,
-        filename=file.filename,
-        processed=False
-    )
-    db.add(db_statement)
-    db.commit()
-    db.refresh(db_statement)
-    
-    try:
-        # Parse PDF
-        parser = PDFParser()
-        transactions_data = parser.parse_statement(pdf_content)
-        
-        # Categorize transactions - use keyword-based (fast, free, no quota issues)
-        # Set use_openai=False to avoid quota problems, or True to enhance with AI
-        categorizer = AICategorizer(use_openai=False)  # Changed to False to avoid quota issues
-        transactions_data = categorizer.categorize_batch(transactions_data, use_ai=False)
-        
-        # Save transactions to database (with additional validation)
-        valid_count = 0
-        for trans_data in transactions_data:
-            # Additional validation before saving
-            amount = trans_data.get("amount", 0)
-            description = trans_data.get("description", "")
-            
-            # Skip if amount is invalid or description is too short
-            if amount < 1 or amount > 10000000 or len(description) < 5:
-                continue
-            
-            # Skip if description is mostly numbers
-            num_chars = sum(c.isdigit() for c in description)
-            if num_chars > len(description) * 0.7:
-                continue
-            
-            db_transaction = Transaction(
-                statement_id=db_statement.id,
-                user_id=current_user.id,
-                date=trans_data["date"],
-                description=description,
-                amount=amount,
-                transaction_type=trans_data["transaction_type"],
-                category=trans_data.get("category"),
-                original_text=trans_data.get("original_text", "")[:200]  # Limit length
-            )
-            db.add(db_transaction)
-            valid_count += 1
-        
-        # Mark statement as processed
-        db_statement.processed = True
-        db.commit()
-        db.refresh(db_statement)
-        
-        return db_statement
-    
-    except Exception as e:
-        db_statement.processed = False
-        db.commit()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error processing PDF: {str(e)}"
-        )
-
-@router.get("/", response_model=List[StatementResponse])
-async def get_statements(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get all statements for current user"""
-    statements = db.query(Statement).filter(Statement.user_id == current_user.id).all()
-    return statements
-
-@router.delete("/{statement_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_statement(
-    statement_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Delete a statement and all its transactions"""
-    statement = db.query(Statement).filter(
-        Statement.id == statement_id,
-        Statement.user_id == current_user.id
-    ).first()
-    
-    if not statement:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Statement not found"
-        )
-    
-    # Delete all transactions first
-    db.query(Transaction).filter(Transaction.statement_id == statement_id).delete()
-    
-    # Delete the statement
-    db.delete(statement)
-    db.commit()
-    
-    return None
-
-@router.get("/{statement_id}/csv")
-async def export_to_csv(
-    statement_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Export statement transactions to CSV"""
-    statement = db.query(Statement).filter(
-        Statement.id == statement_id,
-        Statement.user_id == current_user.id
-    ).first()
-    
-    if not statement:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Statement not found"
-        )
-    
-    transactions = db.query(Transaction).filter(
-        Transaction.statement_id == statement_id
-    ).all()
-    
-    # Create CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["Date", "Description", "Amount", "Type", "Category"])
-    
-    for trans in transactions:
-        writer.writerow([
-            trans.date.strftime("%Y-%m-%d"),
-            trans.description,
-            trans.amount,
-            trans.transaction_type,
-            trans.category or ""
-        ])
-    
-    return {
-        "filename": f"{statement.filename.replace('.pdf', '')}.csv",
-        "content": output.getvalue()
-    }
-
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db
+from app.models import Statement, Transaction
+from app.schemas import StatementResponse, StatementUploadResponse, StatementStatusResponse, TransactionResponse
+from app.auth import Principal, get_current_principal
+from app.services.ingestion import process_statement
+from app.services.job_queue import get_ingestion_queue
+from app.services.parse_cache import content_hash
+from app.services.rollups import remove_statement
+from app.services.export import EXPORT_FORMATS, parquet_available, stream_transactions
+from datetime import datetime
+from typing import List, Optional
+import asyncio
+import csv
+import io
+
+router = APIRouter()
+
+@router.post("/upload", response_model=StatementUploadResponse, status_code=status.HTTP_202_ACCEPTED)
+async def upload_statement(
+    response: Response,
+    file: UploadFile = File(...),
+    wait: bool = Query(False, description="Parse before responding instead of queueing the statement"),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    """Upload a bank statement PDF and queue it for processing (or process it right away with wait=true)"""
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only PDF files are supported"
+        )
+    
+    # Read PDF file
+    pdf_content = await file.read()
+    pdf_hash = content_hash(pdf_content)
+    
+    # The same user uploading the same PDF again gets the existing statement back
+    existing = await db.scalar(select(Statement).where(
+        Statement.user_id == current_user.id,
+        Statement.content_hash == pdf_hash,
+        Statement.status != "failed"
+    ))
+    if existing:
+        response.status_code = status.HTTP_200_OK
+        return StatementUploadResponse(
+            id=existing.id,
+            filename=existing.filename,
+            uploaded_at=existing.uploaded_at,
+            processed=existing.processed,
+            job_id=existing.id,
+            status=existing.status,
+            status_url=f"/api/statements/{existing.id}/status",
+            duplicate=True
+        )
+    
+    # Create statement record, the raw PDF is kept until the worker has parsed it
+    db_statement = Statement(
+        user_id=current_user.id,
+        filename=file.filename,
+        processed=False,
+        status="pending",
+        progress=0,
+        pdf_content=pdf_content,
+        content_hash=pdf_hash
+    )
+    db.add(db_statement)
+    await db.commit()
+    await db.refresh(db_statement)
+    
+    ingestion_queue = get_ingestion_queue()
+    if wait:
+        # Parse in the shared worker pool from a thread, the event loop keeps serving
+        # other requests meanwhile. A statement left unfinished by a restart is
+        # picked up again by requeue_pending_statements.
+        await asyncio.to_thread(process_statement, db_statement.id, ingestion_queue.parse_pool)
+        await db.refresh(db_statement)
+        response.status_code = status.HTTP_200_OK
+        job_id = db_statement.id
+    else:
+        # Parsing and categorization happen in the ingestion worker pool
+        job_id = ingestion_queue.submit(db_statement.id)
+    
+    return StatementUploadResponse(
+        id=db_statement.id,
+        filename=db_statement.filename,
+        uploaded_at=db_statement.uploaded_at,
+        processed=db_statement.processed,
+        job_id=job_id,
+        status=db_statement.status,
+        status_url=f"/api/statements/{db_statement.id}/status"
+    )
+
+@router.get("/", response_model=List[StatementResponse])
+async def get_statements(
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get all statements for current user"""
+    statements = (await db.scalars(select(Statement).where(Statement.user_id == current_user.id))).all()
+    return statements
+
+@router.get("/{statement_id}/status", response_model=StatementStatusResponse)
+async def get_statement_status(
+    statement_id: int,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the processing status of an uploaded statement"""
+    statement = await db.scalar(select(Statement).where(
+        Statement.id == statement_id,
+        Statement.user_id == current_user.id
+    ))
+    
+    if not statement:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Statement not found"
+        )
+    
+    # Statements uploaded before background processing have no status fields
+    if statement.status:
+        statement_status = statement.status
+    else:
+        statement_status = "completed" if statement.processed else "pending"
+    
+    return StatementStatusResponse(
+        id=statement.id,
+        filename=statement.filename,
+        status=statement_status,
+        processed=bool(statement.processed),
+        progress=statement.progress if statement.progress is not None else (100 if statement.processed else 0),
+        transactions_count=statement.transactions_count or 0,
+        error_message=statement.error_message,
+        uploaded_at=statement.uploaded_at,
+        processed_at=statement.processed_at
+    )
+
+@router.delete("/{statement_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_statement(
+    statement_id: int,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete a statement and all its transactions"""
+    statement = await db.scalar(select(Statement).where(
+        Statement.id == statement_id,
+        Statement.user_id == current_user.id
+    ))
+    
+    if not statement:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Statement not found"
+        )
+    
+    # Delete all transactions first, keeping the monthly rollups in step
+    await db.run_sync(remove_statement, current_user.id, statement_id)
+    await db.execute(delete(Transaction).where(Transaction.statement_id == statement_id))
+    
+    # Delete the statement
+    await db.delete(statement)
+    await db.commit()
+    
+    return None
+
+@router.get("/export")
+async def export_transactions(
+    format: str = Query("csv", pattern="^(csv|ndjson|parquet)$"),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    statement_id: Optional[int] = None,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream the account's transactions as CSV, NDJSON or Parquet, optionally for one statement and/or date range"""
+    if statement_id is not None:
+        statement = await db.scalar(select(Statement).where(
+            Statement.id == statement_id,
+            Statement.user_id == current_user.id
+        ))
+        if not statement:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Statement not found"
+            )
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Parquet export requires the pyarrow package on the server"
+        )
+    
+    filename = f"transactions-{datetime.utcnow().strftime('%Y%m%d')}.{format}"
+    return StreamingResponse(
+        stream_transactions(format, current_user.id, start_date, end_date, statement_id),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/{statement_id}/csv")
+async def export_to_csv(
+    statement_id: int,
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db)
+):
+    """Export statement transactions to CSV (legacy JSON-wrapped response, see /export for streaming)"""
+    statement = await db.scalar(select(Statement).where(
+        Statement.id == statement_id,
+        Statement.user_id == current_user.id
+    ))
+    
+    if not statement:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Statement not found"
+        )
+    
+    transactions = (await db.scalars(select(Transaction).where(
+        Transaction.statement_id == statement_id
+    ))).all()
+    
+    # Create CSV
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["Date", "Description", "Amount", "Type", "Category"])
+    
+    for trans in transactions:
+        writer.writerow([
+            trans.date.strftime("%Y-%m-%d"),
+            trans.description,
+            trans.amount,
+            trans.transaction_type,
+            trans.category or ""
+        ])
+    
+    return {
+        "filename": f"{statement.filename.replace('.pdf', '')}.csv",
+        "content": output.getvalue()
+    }
+
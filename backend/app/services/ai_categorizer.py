@@ -1,155 +1,216 @@
-import os
-from openai import OpenAI
-from typing import Dict, List, Optional
-from dotenv import load_dotenv
-import time
-
-load_dotenv()
-
-class AICategorizer:
-    """Use keyword-based categorization with optional OpenAI enhancement"""
-    
-    CATEGORIES = [
-        "Food",
-        "Transportation",
-        "Payments/Recurring expenses",
-        "Personal shopping",
-        "Entertainment"
-    ]
-    
-    def __init__(self, use_openai: bool = True):
-        self.use_openai = use_openai
-        self.openai_available = False
-        self.client = None
-        
-        api_key = os.getenv("OPENAI_API_KEY")
-        if api_key and use_openai:
-            try:
-                self.client = OpenAI(api_key=api_key)
-                self.openai_available = True
-            except Exception as e:
-                print(f"Warning: OpenAI initialization failed: {e}")
-                self.openai_available = False
-    
-    def categorize_transaction(self, description: str, amount: float, use_ai: bool = False) -> str:
-        """Categorize a single transaction - uses keyword-based first, AI as optional enhancement"""
-        # Always try keyword-based first (fast and free)
-        keyword_category = self.get_smart_category(description)
-        
-        # Only use AI if explicitly requested and available
-        if use_ai and self.openai_available and self.client:
-            try:
-                prompt = f"""Categorize this bank transaction into one of these categories:
-- Food
-- Transportation
-- Payments/Recurring expenses
-- Personal shopping
-- Entertainment
-
-Transaction description: "{description}"
-Amount: {amount}
-
-Respond with ONLY the category name, nothing else."""
-
-                response = self.client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are a financial categorization assistant. Always respond with only the category name."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=20,
-                    temperature=0.3
-                )
-                ai_category = response.choices[0].message.content.strip()
-                
-                # Validate AI category
-                if ai_category in self.CATEGORIES:
-                    return ai_category
-                # Try to match partial
-                for cat in self.CATEGORIES:
-                    if cat.lower() in ai_category.lower() or ai_category.lower() in cat.lower():
-                        return cat
-            except Exception as e:
-                # If OpenAI fails (quota, etc.), fall back to keyword-based
-                error_str = str(e)
-                if "quota" in error_str.lower() or "429" in error_str:
-                    print(f"OpenAI quota exceeded, using keyword-based categorization")
-                    self.openai_available = False  # Disable AI for rest of batch
-                else:
-                    print(f"Error categorizing with AI: {e}")
-        
-        # Return keyword-based category (default)
-        return keyword_category
-    
-    def categorize_batch(self, transactions: List[Dict], use_ai: bool = False) -> List[Dict]:
-        """Categorize multiple transactions efficiently - uses keyword-based by default"""
-        categorized = []
-        ai_count = 0
-        max_ai_requests = 10  # Limit AI requests to avoid quota issues
-        
-        for transaction in transactions:
-            # Use AI only for first N transactions if requested, otherwise use keywords
-            should_use_ai = use_ai and ai_count < max_ai_requests and self.openai_available
-            
-            category = self.categorize_transaction(
-                transaction.get("description", ""),
-                transaction.get("amount", 0),
-                use_ai=should_use_ai
-            )
-            
-            if should_use_ai:
-                ai_count += 1
-                # Small delay to avoid rate limits
-                time.sleep(0.1)
-            
-            transaction["category"] = category
-            categorized.append(transaction)
-        
-        return categorized
-    
-    def get_smart_category(self, description: str) -> str:
-        """Quick categorization based on keywords - primary method"""
-        description_lower = description.lower()
-        
-        # Food keywords (expanded for Mexican context)
-        food_keywords = [
-            "restaurant", "rest", "food", "uber eats", "rappi", "starbucks", "cafe", "cafeteria",
-            "super", "supermarket", "tienda", "comida", "taqueria", "taqueria", "burger", "pizza",
-            "dominos", "little caesars", "bross", "capitako", "farmacia", "farmacia guadalajara",
-            "oxxo", "7-eleven", "soriana", "walmart", "chedraui", "comercial mexicana"
-        ]
-        if any(keyword in description_lower for keyword in food_keywords):
-            return "Food"
-        
-        # Transportation keywords
-        transport_keywords = [
-            "uber", "taxi", "gasolina", "gas", "metro", "transporte", "parking", "estacionamiento",
-            "did", "cabify", "viaje", "viajes"
-        ]
-        if any(keyword in description_lower for keyword in transport_keywords):
-            return "Transportation"
-        
-        # Recurring expenses / Payments
-        recurring_keywords = [
-            "netflix", "spotify", "amazon prime", "renta", "rent", "luz", "electric", "agua", "water",
-            "internet", "phone", "telefono", "telcel", "movistar", "at&t", "spei enviado",
-            "conekta", "subscription", "suscripcion", "pago", "payment"
-        ]
-        if any(keyword in description_lower for keyword in recurring_keywords):
-            return "Payments/Recurring expenses"
-        
-        # Entertainment
-        entertainment_keywords = [
-            "cine", "movie", "theater", "teatro", "concert", "concierto", "game", "juego",
-            "tickets", "app tickets", "evento", "event"
-        ]
-        if any(keyword in description_lower for keyword in entertainment_keywords):
-            return "Entertainment"
-        
-        # Income detection
-        if "spei recibido" in description_lower or "abono" in description_lower:
-            # This will be handled by transaction_type, but good to know
-            pass
-        
-        return "Personal shopping"
-
+import os
+import threading
+from collections import OrderedDict
+from openai import OpenAI
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from app.services.ai_scheduler import OPENAI_BASE_URL, OPENAI_MODEL, AICategoryScheduler, match_category
+from app.services.keyword_categorizer import get_keyword_categorizer
+
+load_dotenv()
+
+# Merchant keys (keyword and AI results) remembered per worker process, 0 disables the memo
+CATEGORY_MEMO_SIZE = int(os.getenv("CATEGORY_MEMO_SIZE", "10000"))
+
+# Categorize uploaded statements with OpenAI (batched, see AICategoryScheduler) instead of keywords only
+AI_CATEGORIZATION = os.getenv("AI_CATEGORIZATION", "false").lower() == "true"
+
+class AICategorizer:
+    """Use keyword-based categorization with optional OpenAI enhancement"""
+    
+    # Bump when categories or keywords change, cached parse results are keyed by it
+    VERSION = "1"
+    
+    CATEGORIES = [
+        "Food",
+        "Transportation",
+        "Payments/Recurring expenses",
+        "Personal shopping",
+        "Entertainment"
+    ]
+    
+    def __init__(self, use_openai: bool = True):
+        self.use_openai = use_openai
+        self.openai_available = False
+        self.client = None
+        self.last_ai_stats: Dict = {}
+        
+        api_key = os.getenv("OPENAI_API_KEY")
+        self.api_key = api_key
+        if api_key and use_openai:
+            try:
+                self.client = OpenAI(api_key=api_key, base_url=OPENAI_BASE_URL)
+                self.openai_available = True
+            except Exception as e:
+                print(f"Warning: OpenAI initialization failed: {e}")
+                self.openai_available = False
+    
+    def categorize_transaction(self, description: str, amount: float, use_ai: bool = False) -> str:
+        """Categorize a single transaction - uses keyword-based first, AI as optional enhancement"""
+        # Always try keyword-based first (fast and free)
+        keyword_category = self.get_smart_category(description)
+        
+        # Only use AI if explicitly requested and available
+        if use_ai:
+            ai_category = self.get_ai_category(description, amount)
+            if ai_category:
+                return ai_category
+        
+        # Return keyword-based category (default)
+        return keyword_category
+    
+    def get_ai_category(self, description: str, amount: float) -> Optional[str]:
+        """Ask OpenAI for the category, None if unavailable, failed or not a known category"""
+        if not (self.openai_available and self.client):
+            return None
+        try:
+            prompt = f"""Categorize this bank transaction into one of these categories:
+- Food
+- Transportation
+- Payments/Recurring expenses
+- Personal shopping
+- Entertainment
+
+Transaction description: "{description}"
+Amount: {amount}
+
+Respond with ONLY the category name, nothing else."""
+
+            response = self.client.chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=[
+                    {"role": "system", "content": "You are a financial categorization assistant. Always respond with only the category name."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=20,
+                temperature=0.3
+            )
+            # Validate AI category (exact, then partial match)
+            return match_category(response.choices[0].message.content, self.CATEGORIES)
+        except Exception as e:
+            # If OpenAI fails (quota, etc.), fall back to keyword-based
+            error_str = str(e)
+            if "quota" in error_str.lower() or "429" in error_str:
+                print(f"OpenAI quota exceeded, using keyword-based categorization")
+                self.openai_available = False  # Disable AI for rest of batch
+            else:
+                print(f"Error categorizing with AI: {e}")
+        return None
+    
+    def categorize_batch(self, transactions: List[Dict], use_ai: bool = False) -> List[Dict]:
+        """Categorize multiple transactions efficiently - uses keyword-based by default.
+        
+        Categories are memoized per merchant key (see `normalize_merchant`) across
+        batches, so a merchant seen before costs no regex pass and no OpenAI call.
+        With `use_ai`, the remaining merchants go to OpenAI in batched prompts (see
+        AICategoryScheduler); any the model does not answer fall back to keywords.
+        """
+        keywords = get_keyword_categorizer()
+        memo = get_category_memo()
+        merchant_keys: Dict[str, str] = {}  # Exact repeats within the batch skip normalization
+        merchants = []
+        for transaction in transactions:
+            description = transaction.get("description", "")
+            merchant = merchant_keys.get(description)
+            if merchant is None:
+                merchant = merchant_keys[description] = keywords.merchant_key(description)
+            merchants.append(merchant)
+        
+        ai_categories: Dict[str, str] = {}
+        if use_ai and self.openai_available:
+            pending: Dict[str, Tuple[str, float]] = {}
+            for transaction, merchant in zip(transactions, merchants):
+                if merchant in pending or merchant in ai_categories:
+                    continue
+                category = memo.get(("ai", merchant))
+                if category is None:
+                    pending[merchant] = (transaction.get("description", ""), transaction.get("amount", 0))
+                else:
+                    ai_categories[merchant] = category
+            scheduler = AICategoryScheduler(self.api_key, self.CATEGORIES)
+            try:
+                answers = scheduler.categorize(list(pending.values()))
+            except Exception as e:
+                # Whatever went wrong, the statement still gets keyword categories
+                print(f"Error categorizing with AI: {e}")
+                answers = []
+            for merchant, category in zip(pending, answers):
+                if category:
+                    ai_categories[merchant] = category
+                    memo.set(("ai", merchant), category)
+            if scheduler.quota_exhausted:
+                self.openai_available = False  # Disable AI for later batches
+            self.last_ai_stats = scheduler.stats
+        
+        keyword_categories: Dict[str, str] = {}
+        for transaction, merchant in zip(transactions, merchants):
+            category = ai_categories.get(merchant) or keyword_categories.get(merchant)
+            if category is None:
+                category = memo.get(("keyword", merchant))
+                if category is None:
+                    # The merchant key always gets the same category as the full description
+                    category = keywords.categorize(merchant)
+                    memo.set(("keyword", merchant), category)
+                keyword_categories[merchant] = category
+            transaction["category"] = category
+        
+        return list(transactions)
+    
+    def get_smart_category(self, description: str) -> str:
+        """Quick categorization based on keywords - primary method"""
+        return get_keyword_categorizer().categorize(description)
+
+
+class CategoryMemo:
+    """Bounded LRU from (source, merchant key) to category, shared by every categorizer in a process"""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key: Tuple[str, str]) -> Optional[str]:
+        with self._lock:
+            category = self.entries.get(key)
+            if category is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return category
+    
+    def set(self, key: Tuple[str, str], category: str) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self.entries[key] = category
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self.entries),
+                "evictions": self.evictions,
+            }
+
+
+_category_memo: Optional[CategoryMemo] = None
+_memo_lock = threading.Lock()
+
+
+def get_category_memo() -> CategoryMemo:
+    global _category_memo
+    with _memo_lock:
+        if _category_memo is None:
+            _category_memo = CategoryMemo(CATEGORY_MEMO_SIZE)
+        return _category_memo
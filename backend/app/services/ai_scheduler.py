@@ -0,0 +1,264 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+from openai import APIConnectionError, APIStatusError, APITimeoutError, AsyncOpenAI, RateLimitError
+
+load_dotenv()
+
+# Any OpenAI-compatible endpoint (e.g. benchmarks/mock_openai.py), None = api.openai.com
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+
+# Descriptions per prompt, requests in flight, request rate and retries after 429/5xx.
+# AI_REQUESTS_PER_MINUTE is for the whole server process: parse-pool workers each
+# get an equal share of it (see set_process_share)
+AI_BATCH_SIZE = int(os.getenv("AI_BATCH_SIZE", "25"))
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+AI_REQUESTS_PER_MINUTE = float(os.getenv("AI_REQUESTS_PER_MINUTE", "60"))
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "5"))
+AI_REQUEST_TIMEOUT = float(os.getenv("AI_REQUEST_TIMEOUT", "30"))
+
+MAX_BACKOFF_SECONDS = 60.0
+
+
+def match_category(answer: str, categories: Sequence[str]) -> Optional[str]:
+    """Map a model answer onto a known category (exact, then partial match), None if it is not one"""
+    answer = (answer or "").strip()
+    if answer in categories:
+        return answer
+    answer_lower = answer.lower()
+    if not answer_lower:
+        return None
+    for category in categories:
+        if category.lower() in answer_lower or answer_lower in category.lower():
+            return category
+    return None
+
+
+class TokenBucket:
+    """Token bucket: `rate` requests per second with bursts of up to `capacity`.
+
+    `pause` holds every caller back (e.g. for a 429's Retry-After) and drops the
+    saved-up burst, so waiting requests resume one by one instead of all at once.
+    `throttle` halves the rate after a 429 and `recover` wins it back gradually
+    on success (additive increase, multiplicative decrease). State sits behind a
+    thread lock, so one bucket can serve every event loop in the process.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = min(self.tokens, 1.0)
+            self.updated = max(self.updated, self.paused_until)
+
+    def throttle(self) -> None:
+        with self._lock:
+            self.rate = max(self.max_rate / 64, self.rate / 2)
+
+    def recover(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 16)
+
+    async def acquire(self) -> None:
+        while True:
+            wait = self._take()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def _take(self) -> float:
+        """Take a token, or return the seconds to wait before trying again"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+            self.tokens = min(self.capacity, self.tokens + max(0.0, now - self.updated) * self.rate)
+            self.updated = max(self.updated, now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+_rate_limiter: Optional[TokenBucket] = None
+_rate_limiter_lock = threading.Lock()
+# Processes sharing AI_REQUESTS_PER_MINUTE, set by parse-pool workers at startup
+_process_share = 1
+
+
+def set_process_share(processes: int) -> None:
+    """Limit this process to 1/processes of AI_REQUESTS_PER_MINUTE (call before the first request)"""
+    global _process_share
+    _process_share = max(1, processes)
+
+
+def get_rate_limiter() -> TokenBucket:
+    """The process-wide bucket, so 429 throttling carries over from one statement to the next"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            rate = AI_REQUESTS_PER_MINUTE / 60.0 / _process_share
+            _rate_limiter = TokenBucket(rate, capacity=max(1.0, min(AI_MAX_CONCURRENCY, rate)))
+        return _rate_limiter
+
+
+class AICategoryScheduler:
+    """Categorize many transactions with few chat completions.
+
+    Descriptions are packed `batch_size` to a prompt that asks for a JSON list of
+    categories. Up to `max_concurrency` prompts are in flight, started no faster
+    than `bucket` allows (by default the process-wide one, see get_rate_limiter).
+    A 429 pauses the whole bucket (Retry-After or exponential backoff with
+    jitter) and halves its rate before the batch is retried. A failed batch,
+    a malformed reply or an unknown category yields None for the affected items,
+    and the caller falls back to keywords for them. Exhausted quota stops all AI
+    requests for the run.
+    """
+
+    def __init__(self, api_key: str, categories: Sequence[str], base_url: Optional[str] = OPENAI_BASE_URL,
+                 model: str = OPENAI_MODEL, batch_size: int = AI_BATCH_SIZE,
+                 max_concurrency: int = AI_MAX_CONCURRENCY, bucket: Optional[TokenBucket] = None,
+                 max_retries: int = AI_MAX_RETRIES, timeout: float = AI_REQUEST_TIMEOUT):
+        self.api_key = api_key
+        self.categories = list(categories)
+        self.base_url = base_url
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.bucket = bucket
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.quota_exhausted = False
+        self.stats: Dict[str, int] = {}
+
+    def categorize(self, items: Sequence[Tuple[str, float]]) -> List[Optional[str]]:
+        """Categories for (description, amount) items, None where the model gave no usable answer"""
+        if not items:
+            return []
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.categorize_async(items))
+        # Called from async code: run on a private loop instead of blocking this one's
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.categorize_async(items)).result()
+
+    async def categorize_async(self, items: Sequence[Tuple[str, float]]) -> List[Optional[str]]:
+        self.stats = {"items": len(items), "requests": 0, "rate_limited": 0, "retries": 0,
+                      "failed_batches": 0, "unanswered": 0}
+        results: List[Optional[str]] = [None] * len(items)
+        bucket = self.bucket or get_rate_limiter()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0, timeout=self.timeout)
+        try:
+            starts = range(0, len(items), self.batch_size)
+            await asyncio.gather(*(
+                self._run_batch(client, bucket, semaphore, items, start, results) for start in starts
+            ))
+        finally:
+            await client.close()
+        self.stats["unanswered"] = sum(1 for category in results if category is None)
+        return results
+
+    async def _run_batch(self, client: AsyncOpenAI, bucket: TokenBucket, semaphore: asyncio.Semaphore,
+                         items: Sequence[Tuple[str, float]], start: int, results: List[Optional[str]]) -> None:
+        batch = items[start:start + self.batch_size]
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                if self.quota_exhausted:
+                    return
+                await bucket.acquire()
+                self.stats["requests"] += 1
+                try:
+                    answers = await self._request(client, batch)
+                except RateLimitError as e:
+                    self.stats["rate_limited"] += 1
+                    if _is_quota_error(e):
+                        print("OpenAI quota exceeded, using keyword-based categorization")
+                        self.quota_exhausted = True
+                        return
+                    bucket.throttle()
+                    bucket.pause(self._backoff(attempt, e.response.headers.get("retry-after")))
+                except (APIConnectionError, APITimeoutError):
+                    bucket.pause(self._backoff(attempt, None))
+                except APIStatusError as e:
+                    if e.status_code < 500:
+                        print(f"Error categorizing with AI: {e}")
+                        break
+                    bucket.pause(self._backoff(attempt, e.response.headers.get("retry-after")))
+                except Exception as e:
+                    # Malformed response (no choices, no message...): keywords for this batch
+                    print(f"Error categorizing with AI: {e}")
+                    break
+                else:
+                    bucket.recover()
+                    results[start:start + len(batch)] = answers
+                    return
+                if attempt < self.max_retries:
+                    self.stats["retries"] += 1
+            self.stats["failed_batches"] += 1
+
+    async def _request(self, client: AsyncOpenAI, batch: Sequence[Tuple[str, float]]) -> List[Optional[str]]:
+        lines = "\n".join(
+            f"{i}. {json.dumps(description, ensure_ascii=False)} (amount {amount})"
+            for i, (description, amount) in enumerate(batch, start=1)
+        )
+        prompt = (
+            f"Categorize each bank transaction into one of these categories: {', '.join(self.categories)}.\n"
+            f'Respond with ONLY a JSON object {{"categories": [...]}} holding one category per '
+            f"transaction, in the same order ({len(batch)} in total).\n\n"
+            f"Transactions:\n{lines}"
+        )
+        response = await client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": "You are a financial categorization assistant. Always respond with JSON only."},
+                {"role": "user", "content": prompt}
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=16 * len(batch) + 32,
+            temperature=0.3
+        )
+        return self._parse_answers(response.choices[0].message.content, len(batch))
+
+    def _parse_answers(self, content: Optional[str], count: int) -> List[Optional[str]]:
+        """Categories from a JSON reply, None for missing or unknown entries"""
+        try:
+            data = json.loads(content or "")
+        except ValueError:
+            return [None] * count
+        answers = data.get("categories") if isinstance(data, dict) else data
+        if not isinstance(answers, list):
+            return [None] * count
+        matched = [match_category(answer, self.categories) if isinstance(answer, str) else None for answer in answers[:count]]
+        return matched + [None] * (count - len(matched))
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: Optional[str]) -> float:
+        """Seconds to wait: the server's Retry-After when given, else 2^attempt with jitter"""
+        if retry_after:
+            try:
+                return min(MAX_BACKOFF_SECONDS, float(retry_after))
+            except ValueError:
+                pass
+        return min(MAX_BACKOFF_SECONDS, (2 ** attempt) * (0.5 + random.random()))
+
+
+def _is_quota_error(error: RateLimitError) -> bool:
+    """429 because the account is out of credit (retrying will not help) rather than throttled"""
+    return getattr(error, "code", None) == "insufficient_quota" or "quota" in str(error).lower()
@@ -0,0 +1,214 @@
+from datetime import datetime
+from typing import Dict, List
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Session
+from app.models import Transaction
+from app.schemas import CategorySummary, TopTransaction
+from app.services.rollups import month_key, summarize_range
+
+
+def _in_range(user_id: int, start_date: datetime, end_date: datetime):
+    return and_(
+        Transaction.user_id == user_id,
+        Transaction.date >= start_date,
+        Transaction.date <= end_date
+    )
+
+
+def _top_expenses(db: Session, in_range) -> List[TopTransaction]:
+    """Top 10 largest expenses (ties keep insertion order, like the stable sort did)"""
+    top_rows = db.execute(
+        select(Transaction.description, Transaction.amount, Transaction.date, Transaction.category)
+        .where(in_range, Transaction.transaction_type == "expense")
+        .order_by(Transaction.amount.desc(), Transaction.id)
+        .limit(10)
+    ).all()
+    return [
+        TopTransaction(
+            description=description[:50],  # Limit description length
+            amount=amount,
+            date=date,
+            category=category
+        )
+        for description, amount, date, category in top_rows
+    ]
+
+
+def summarize_transactions_rollup(db: Session, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
+    """Dashboard summary from monthly rollups, O(months x categories) instead of O(transactions)"""
+    summary = summarize_range(db, user_id, start_date, end_date)
+
+    total_income = total_expenses = 0.0
+    category_totals: Dict[str, List] = {}
+    monthly_data: Dict[str, Dict[str, float]] = {}
+    for (month, category, transaction_type), (total, count) in summary.items():
+        data = monthly_data.setdefault(month, {"income": 0.0, "expenses": 0.0})
+        if transaction_type == "income":
+            total_income += total
+            data["income"] += total
+        else:
+            # Anything that is not income counts as an expense in the monthly trend
+            data["expenses"] += total
+        if transaction_type == "expense":
+            total_expenses += total
+            if category:
+                category_total = category_totals.setdefault(category, [0.0, 0])
+                category_total[0] += total
+                category_total[1] += count
+
+    category_summary = [
+        CategorySummary(category=category, total=total, count=count)
+        for category, (total, count) in sorted(category_totals.items(), key=lambda item: item[1][0], reverse=True)
+    ]
+    monthly_trend = [
+        {
+            "month": month,
+            "income": data["income"],
+            "expenses": data["expenses"],
+            "net": data["income"] - data["expenses"]
+        }
+        for month, data in sorted(monthly_data.items())
+    ]
+
+    return {
+        "total_income": total_income,
+        "total_expenses": total_expenses,
+        "net_balance": total_income - total_expenses,
+        "category_summary": category_summary,
+        "monthly_trend": monthly_trend,
+        "top_expenses": _top_expenses(db, _in_range(user_id, start_date, end_date)),
+    }
+
+
+def summarize_transactions_sql(db: Session, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
+    """Dashboard totals, category summary, monthly trend and top expenses via GROUP BY queries"""
+    in_range = _in_range(user_id, start_date, end_date)
+    is_income = Transaction.transaction_type == "income"
+    is_expense = Transaction.transaction_type == "expense"
+
+    # Calculate totals
+    total_income, total_expenses = db.execute(
+        select(
+            func.sum(case((is_income, Transaction.amount), else_=0.0)),
+            func.sum(case((is_expense, Transaction.amount), else_=0.0))
+        ).where(in_range)
+    ).one()
+    total_income = float(total_income or 0.0)
+    total_expenses = float(total_expenses or 0.0)
+
+    # Category summary (expenses with a category only)
+    category_rows = db.execute(
+        select(Transaction.category, func.sum(Transaction.amount), func.count(Transaction.id))
+        .where(in_range, is_expense, Transaction.category.isnot(None), Transaction.category != "")
+        .group_by(Transaction.category)
+        .order_by(func.sum(Transaction.amount).desc())
+    ).all()
+    category_summary = [
+        CategorySummary(category=category, total=float(total), count=count)
+        for category, total, count in category_rows
+    ]
+
+    # Monthly trend, anything that is not income counts as an expense
+    month = month_key(db.get_bind().dialect.name).label("month")
+    monthly_rows = db.execute(
+        select(
+            month,
+            func.sum(case((is_income, Transaction.amount), else_=0.0)),
+            func.sum(case((is_income, 0.0), else_=Transaction.amount))
+        )
+        .where(in_range)
+        .group_by(month)
+        .order_by(month)
+    ).all()
+    monthly_trend = [
+        {
+            "month": month_value,
+            "income": float(income or 0.0),
+            "expenses": float(expenses or 0.0),
+            "net": float(income or 0.0) - float(expenses or 0.0)
+        }
+        for month_value, income, expenses in monthly_rows
+    ]
+
+    top_expenses = _top_expenses(db, in_range)
+
+    return {
+        "total_income": total_income,
+        "total_expenses": total_expenses,
+        "net_balance": total_income - total_expenses,
+        "category_summary": category_summary,
+        "monthly_trend": monthly_trend,
+        "top_expenses": top_expenses,
+    }
+
+
+def summarize_transactions_python(db: Session, user_id: int, start_date: datetime, end_date: datetime) -> Dict:
+    """Original in-Python dashboard aggregation, kept as the reference for parity checks"""
+    transactions: List[Transaction] = db.query(Transaction).filter(
+        _in_range(user_id, start_date, end_date)
+    ).all()
+
+    # Calculate totals
+    total_income = sum(t.amount for t in transactions if t.transaction_type == "income")
+    total_expenses = sum(t.amount for t in transactions if t.transaction_type == "expense")
+    net_balance = total_income - total_expenses
+
+    # Category summary
+    category_totals = {}
+    category_counts = {}
+    for trans in transactions:
+        if trans.transaction_type == "expense" and trans.category:
+            category_totals[trans.category] = category_totals.get(trans.category, 0) + trans.amount
+            category_counts[trans.category] = category_counts.get(trans.category, 0) + 1
+
+    category_summary = [
+        CategorySummary(category=cat, total=total, count=category_counts.get(cat, 0))
+        for cat, total in category_totals.items()
+    ]
+
+    # Monthly trend
+    monthly_data = {}
+    for trans in transactions:
+        month = trans.date.strftime("%Y-%m")
+        if month not in monthly_data:
+            monthly_data[month] = {"income": 0, "expenses": 0}
+        if trans.transaction_type == "income":
+            monthly_data[month]["income"] += trans.amount
+        else:
+            monthly_data[month]["expenses"] += trans.amount
+
+    monthly_trend = [
+        {
+            "month": month,
+            "income": data["income"],
+            "expenses": data["expenses"],
+            "net": data["income"] - data["expenses"]
+        }
+        for month, data in sorted(monthly_data.items())
+    ]
+
+    # Top 10 largest expenses
+    top_expenses = sorted(
+        [t for t in transactions if t.transaction_type == "expense"],
+        key=lambda x: x.amount,
+        reverse=True
+    )[:10]
+
+    top_expenses_list = [
+        TopTransaction(
+            description=t.description[:50],  # Limit description length
+            amount=t.amount,
+            date=t.date,
+            category=t.category
+        )
+        for t in top_expenses
+    ]
+
+    return {
+        "total_income": total_income,
+        "total_expenses": total_expenses,
+        "net_balance": net_balance,
+        "category_summary": category_summary,
+        "monthly_trend": monthly_trend,
+        "top_expenses": top_expenses_list,
+    }
@@ -0,0 +1,151 @@
+import csv
+import importlib.util
+import io
+import json
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+from sqlalchemy import select
+from app.database import SessionLocal
+from app.models import Transaction
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+EXPORT_COLUMNS = ["id", "statement_id", "date", "description", "amount", "transaction_type", "category"]
+EXPORT_CHUNK_ROWS = 1000
+
+
+def parquet_available() -> bool:
+    """Parquet export needs pyarrow (pinned in requirements.txt, missing from trimmed installs)"""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _iter_chunks(
+    user_id: int,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    statement_id: Optional[int]
+) -> Iterator[List[Dict]]:
+    """Yield the user's transactions in chunks, streamed from a server-side cursor.
+
+    The generator owns its session: it outlives the request's `get_db` session
+    while the response body is being sent.
+    """
+    query = select(*[getattr(Transaction, column) for column in EXPORT_COLUMNS]).where(
+        Transaction.user_id == user_id
+    )
+    if start_date:
+        query = query.where(Transaction.date >= start_date)
+    if end_date:
+        query = query.where(Transaction.date <= end_date)
+    if statement_id is not None:
+        query = query.where(Transaction.statement_id == statement_id)
+    query = query.order_by(Transaction.date, Transaction.id).execution_options(yield_per=EXPORT_CHUNK_ROWS)
+
+    db = SessionLocal()
+    try:
+        for partition in db.execute(query).mappings().partitions():
+            yield [dict(row) for row in partition]
+    finally:
+        db.close()
+
+
+def iter_csv(chunks: Iterator[List[Dict]]) -> Iterator[str]:
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(EXPORT_COLUMNS)
+    for chunk in chunks:
+        for row in chunk:
+            writer.writerow([
+                row["id"],
+                row["statement_id"],
+                row["date"].strftime("%Y-%m-%d"),
+                row["description"],
+                row["amount"],
+                row["transaction_type"],
+                row["category"] or ""
+            ])
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate()
+    yield output.getvalue()
+
+
+def iter_ndjson(chunks: Iterator[List[Dict]]) -> Iterator[str]:
+    for chunk in chunks:
+        yield "".join(
+            json.dumps({**row, "date": row["date"].isoformat()}, ensure_ascii=False) + "\n"
+            for row in chunk
+        )
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands back whatever was written since the last drain"""
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def iter_parquet(chunks: Iterator[List[Dict]]) -> Iterator[bytes]:
+    """One Parquet row group per chunk, flushed to the client as it is written"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("statement_id", pa.int64()),
+        ("date", pa.timestamp("us")),
+        ("description", pa.string()),
+        ("amount", pa.float64()),
+        ("transaction_type", pa.string()),
+        ("category", pa.string()),
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for chunk in chunks:
+            for row in chunk:
+                if row["date"].tzinfo is not None:
+                    row["date"] = row["date"].astimezone(timezone.utc).replace(tzinfo=None)
+            writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def stream_transactions(
+    export_format: str,
+    user_id: int,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    statement_id: Optional[int] = None
+) -> Iterator:
+    """Body iterator for a StreamingResponse in the given export format"""
+    chunks = _iter_chunks(user_id, start_date, end_date, statement_id)
+    if export_format == "csv":
+        return iter_csv(chunks)
+    if export_format == "ndjson":
+        return iter_ndjson(chunks)
+    if export_format == "parquet":
+        return iter_parquet(chunks)
+    raise ValueError(f"Unknown export format: {export_format}")
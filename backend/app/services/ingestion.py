@@ -0,0 +1,285 @@
+import io
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import and_, insert, or_, update
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models import Statement, Transaction
+from app.services.pdf_parser import PDFParser
+from app.services.ai_categorizer import AI_CATEGORIZATION, AICategorizer, get_category_memo
+from app.services.parse_cache import get_parse_cache, content_hash
+from app.services.parse_pool import ParsePool
+from app.services.rollups import add_transaction_rows
+from app.services.metrics import (
+    CATEGORY_MEMO_LOOKUPS, INGESTION_FORMATS, INGESTION_LINES_SCANNED, INGESTION_LINES_SKIPPED,
+    INGESTION_PAGES, INGESTION_STAGE_SECONDS, INGESTION_STATEMENTS, INGESTION_TRANSACTIONS,
+)
+
+load_dotenv()
+
+# Rows per executemany batch, and whether to use COPY when the database is PostgreSQL
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "1000"))
+INGEST_USE_COPY = os.getenv("INGEST_USE_COPY", "false").lower() == "true"
+
+# A statement left "processing" this long is taken to be abandoned by its job
+# (crashed or stopped server) and may be claimed again; keep it above the
+# longest parse (PARSE_TIMEOUT_SECONDS) plus the insert
+INGESTION_LEASE_SECONDS = float(os.getenv("INGESTION_LEASE_SECONDS", "600"))
+
+COPY_COLUMNS = [
+    "statement_id", "user_id", "date", "description", "amount",
+    "transaction_type", "category", "original_text"
+]
+
+
+def parse_pdf(pdf_content: bytes) -> Tuple[List[Dict], Dict]:
+    """Parse and categorize a statement PDF (CPU-bound, runs in an ingestion worker).
+
+    Returns the categorized transactions and the parser's stats (page and line
+    counts, per-stage seconds).
+    """
+    parser = PDFParser()
+    transactions_data = parser.parse_statement(pdf_content)
+
+    # Categorize transactions - keyword-based (fast, free, no quota issues) unless
+    # AI_CATEGORIZATION sends the whole statement to OpenAI in batched prompts
+    start = time.perf_counter()
+    memo_before = get_category_memo().stats()
+    categorizer = AICategorizer(use_openai=AI_CATEGORIZATION)
+    transactions_data = categorizer.categorize_batch(transactions_data, use_ai=AI_CATEGORIZATION)
+    memo_after = get_category_memo().stats()
+    stats = dict(parser.last_stats)
+    stats["categorize_seconds"] = time.perf_counter() - start
+    # The memo lives in the worker process, report this statement's share of its lookups
+    stats["category_memo_hits"] = memo_after["hits"] - memo_before["hits"]
+    stats["category_memo_misses"] = memo_after["misses"] - memo_before["misses"]
+    return transactions_data, stats
+
+
+def record_parse_stats(parse_stats: Dict) -> None:
+    """Feed a statement's parse stats into the ingestion metrics"""
+    for stage in ("extract", "filter", "regex", "categorize"):
+        seconds = parse_stats.get(f"{stage}_seconds")
+        if seconds is not None:
+            INGESTION_STAGE_SECONDS.observe(seconds, stage=stage)
+    if parse_stats.get("format"):
+        INGESTION_FORMATS.inc(format=parse_stats["format"])
+    INGESTION_PAGES.inc(parse_stats.get("pages_total", 0), kind="total")
+    INGESTION_PAGES.inc(parse_stats.get("pages_extracted", 0), kind="extracted")
+    INGESTION_PAGES.inc(parse_stats.get("pages_skipped_leading", 0), kind="skipped_leading")
+    INGESTION_PAGES.inc(parse_stats.get("pages_skipped_trailing", 0), kind="skipped_trailing")
+    INGESTION_LINES_SCANNED.inc(parse_stats.get("lines_scanned", 0))
+    for rule, count in parse_stats.get("lines_skipped", {}).items():
+        INGESTION_LINES_SKIPPED.inc(count, rule=rule)
+    for reason, count in parse_stats.get("transactions_rejected", {}).items():
+        INGESTION_TRANSACTIONS.inc(count, outcome="rejected", reason=reason)
+    CATEGORY_MEMO_LOOKUPS.inc(parse_stats.get("category_memo_hits", 0), result="hit")
+    CATEGORY_MEMO_LOOKUPS.inc(parse_stats.get("category_memo_misses", 0), result="miss")
+
+
+def build_transaction_rows(statement: Statement, transactions_data: List[Dict]) -> List[Dict]:
+    """Validate parsed transactions and turn them into `transactions` table rows"""
+    rows = []
+    for trans_data in transactions_data:
+        # Additional validation before saving
+        amount = trans_data.get("amount", 0)
+        description = trans_data.get("description", "")
+
+        # Skip if amount is invalid or description is too short
+        if amount < 1 or amount > 10000000 or len(description) < 5:
+            continue
+
+        # Skip if description is mostly numbers
+        num_chars = sum(c.isdigit() for c in description)
+        if num_chars > len(description) * 0.7:
+            continue
+
+        rows.append({
+            "statement_id": statement.id,
+            "user_id": statement.user_id,
+            "date": trans_data["date"],
+            "description": description,
+            "amount": amount,
+            "transaction_type": trans_data["transaction_type"],
+            "category": trans_data.get("category"),
+            "original_text": (trans_data.get("original_text") or "")[:200]  # Limit length
+        })
+    return rows
+
+
+def _copy_field(value) -> str:
+    """A COPY CSV field: None is an unquoted empty field, which PostgreSQL loads as
+    NULL; everything else is quoted, so "" stays an empty string like on the
+    executemany path"""
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _copy_rows(db: Session, rows: List[Dict]) -> None:
+    """Load rows with PostgreSQL COPY on the session's connection (same transaction)"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(",".join(_copy_field(row[column]) for column in COPY_COLUMNS))
+        buffer.write("\n")
+    buffer.seek(0)
+    raw_connection = db.connection().connection.driver_connection
+    with raw_connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY transactions ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+
+
+def bulk_insert_transactions(
+    db: Session,
+    rows: List[Dict],
+    batch_size: int = INGEST_BATCH_SIZE,
+    use_copy: bool = INGEST_USE_COPY
+) -> None:
+    """Insert transaction rows in executemany batches, or with COPY on PostgreSQL.
+
+    Nothing is committed here, the caller commits once per statement.
+    """
+    if not rows:
+        return
+    if use_copy and db.get_bind().dialect.name == "postgresql":
+        _copy_rows(db, rows)
+        return
+    for start in range(0, len(rows), batch_size):
+        db.execute(insert(Transaction), rows[start:start + batch_size])
+
+
+def save_transactions(db: Session, statement: Statement, transactions_data: List[Dict]) -> int:
+    """Insert parsed transactions for a statement, returns how many were kept"""
+    rows = build_transaction_rows(statement, transactions_data)
+    bulk_insert_transactions(db, rows)
+    add_transaction_rows(db, statement.user_id, rows)
+    return len(rows)
+
+
+def claimable(now: datetime):
+    """Condition for statements an ingestion job may claim: pending, or processing with a stale claim"""
+    stale = now - timedelta(seconds=INGESTION_LEASE_SECONDS)
+    return and_(
+        Statement.processed == False,
+        or_(
+            Statement.status == "pending",
+            and_(
+                Statement.status == "processing",
+                or_(Statement.claimed_at.is_(None), Statement.claimed_at < stale)
+            )
+        )
+    )
+
+
+def claim_statement(db: Session, statement_id: int) -> Optional[datetime]:
+    """Take a statement for ingestion, returns the claim time or None if it is done or claimed.
+
+    A single conditional UPDATE, so when several server processes requeue the
+    same statements at startup only one of them parses each. "processing"
+    statements are only taken over once their claim is older than
+    INGESTION_LEASE_SECONDS (or has none, from before claims existed).
+    """
+    now = datetime.utcnow()
+    result = db.execute(
+        update(Statement)
+        .where(Statement.id == statement_id, claimable(now))
+        .values(status="processing", progress=10, claimed_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return now if result.rowcount == 1 else None
+
+
+def _update_claimed(db: Session, statement_id: int, claim: datetime, **values) -> bool:
+    """Update the statement if this job still holds its claim (nothing is committed here)"""
+    result = db.execute(
+        update(Statement)
+        .where(Statement.id == statement_id, Statement.claimed_at == claim)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def process_statement(statement_id: int, parse_pool: Optional[ParsePool] = None) -> None:
+    """Run the ingestion job for an uploaded statement.
+
+    Parsing is handed to `parse_pool` (worker processes, with a timeout) when given,
+    otherwise it runs on the calling thread. Progress and the final outcome are stored on the statement.
+    The job only runs if it can claim the statement (see `claim_statement`), and
+    its results are only saved if the claim is still its own when it finishes.
+    """
+    db = SessionLocal()
+    try:
+        claim = claim_statement(db, statement_id)
+        if claim is None:
+            return
+        statement = db.query(Statement).filter(Statement.id == statement_id).first()
+        if not statement:
+            return
+
+        pdf_content = statement.pdf_content
+        if not pdf_content:
+            INGESTION_STATEMENTS.inc(status="failed")
+            _update_claimed(db, statement_id, claim, status="failed", claimed_at=None,
+                            error_message="Original PDF is no longer available")
+            db.commit()
+            return
+
+        try:
+            # Re-uploads of a known PDF skip pdfplumber and go straight to the insert
+            pdf_hash = statement.content_hash or content_hash(pdf_content)
+            parse_cache = get_parse_cache()
+            transactions_data = parse_cache.get(pdf_hash)
+            if transactions_data is None:
+                if parse_pool is not None:
+                    transactions_data, parse_stats = parse_pool.run(parse_pdf, pdf_content)
+                else:
+                    transactions_data, parse_stats = parse_pdf(pdf_content)
+                parse_cache.set(pdf_hash, transactions_data)
+                record_parse_stats(parse_stats)
+                print(
+                    f"Statement {statement_id} ({parse_stats.get('format')}): extracted {parse_stats.get('pages_extracted')} of "
+                    f"{parse_stats.get('pages_total')} pages (skipped {parse_stats.get('pages_skipped_leading')} "
+                    f"leading, {parse_stats.get('pages_skipped_trailing')} trailing), "
+                    f"scanned {parse_stats.get('lines_scanned')} lines in "
+                    f"{parse_stats.get('extract_seconds', 0.0):.3f}s extract / "
+                    f"{parse_stats.get('filter_seconds', 0.0) + parse_stats.get('regex_seconds', 0.0):.3f}s scan"
+                )
+            claimed = _update_claimed(db, statement_id, claim, progress=70)
+            db.commit()
+            if not claimed:
+                print(f"Statement {statement_id} was claimed by another ingestion job, discarding this parse")
+                return
+
+            insert_start = time.perf_counter()
+            valid_count = save_transactions(db, statement, transactions_data)
+
+            # Mark statement as processed and drop the raw PDF, it is no longer needed
+            if not _update_claimed(
+                db, statement_id, claim, processed=True, status="completed", progress=100, claimed_at=None,
+                transactions_count=valid_count, processed_at=datetime.utcnow(), error_message=None,
+                pdf_content=None
+            ):
+                # Lease expired and another job took the statement over: its rows win
+                db.rollback()
+                print(f"Statement {statement_id} was claimed by another ingestion job, discarding this parse")
+                return
+            db.commit()
+            INGESTION_STAGE_SECONDS.observe(time.perf_counter() - insert_start, stage="db_insert")
+            INGESTION_TRANSACTIONS.inc(valid_count, outcome="accepted", reason="")
+            INGESTION_TRANSACTIONS.inc(len(transactions_data) - valid_count, outcome="rejected", reason="ingest_validation")
+            INGESTION_STATEMENTS.inc(status="completed")
+        except Exception as e:
+            INGESTION_STATEMENTS.inc(status="failed")
+            db.rollback()
+            _update_claimed(db, statement_id, claim, processed=False, status="failed", claimed_at=None,
+                            error_message=f"Error processing PDF: {str(e)}")
+            db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,113 @@
+import os
+import queue
+import threading
+from datetime import datetime
+from typing import List, Optional
+from dotenv import load_dotenv
+from app.database import SessionLocal
+from app.models import Statement
+from app.services.ingestion import claimable, process_statement
+from app.services.parse_pool import ParsePool, get_parse_pool, shutdown_parse_pool
+
+load_dotenv()
+
+# "process" parses in the shared pool of worker processes (see parse_pool.py),
+# "inprocess" parses on the dispatcher threads (no extra processes, handy for
+# local development)
+INGESTION_BACKEND = os.getenv("INGESTION_BACKEND", "process")
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", "2"))
+
+
+class IngestionQueue:
+    """In-process queue of statement ids waiting to be parsed.
+
+    Dispatcher threads pull jobs off the queue and run `process_statement`, which
+    hands the CPU-bound parsing to the shared parse pool and writes the results.
+    The statements table is the durable record of pending work, see
+    `requeue_pending_statements`.
+    """
+
+    def __init__(self, backend: str = INGESTION_BACKEND, workers: int = INGESTION_WORKERS):
+        if backend not in ("process", "inprocess"):
+            raise ValueError(f"Unknown ingestion backend: {backend}")
+        self.backend = backend
+        self.workers = max(1, workers)
+        self._queue: "queue.Queue[Optional[int]]" = queue.Queue()
+        self.parse_pool: Optional[ParsePool] = get_parse_pool() if backend == "process" else None
+        self._threads: List[threading.Thread] = []
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"ingestion-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, statement_id: int) -> int:
+        """Queue a statement for parsing, the statement id doubles as the job id"""
+        self._queue.put(statement_id)
+        return statement_id
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self) -> None:
+        while True:
+            statement_id = self._queue.get()
+            try:
+                if statement_id is None:
+                    return
+                process_statement(statement_id, self.parse_pool)
+            except Exception as e:
+                print(f"Error running ingestion job for statement {statement_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def shutdown(self, wait: bool = True) -> None:
+        for _ in self._threads:
+            self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        if self.parse_pool is not None:
+            shutdown_parse_pool(wait=wait)
+
+
+_ingestion_queue: Optional[IngestionQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_ingestion_queue() -> IngestionQueue:
+    global _ingestion_queue
+    with _queue_lock:
+        if _ingestion_queue is None:
+            _ingestion_queue = IngestionQueue()
+        return _ingestion_queue
+
+
+def shutdown_ingestion_queue(wait: bool = True) -> None:
+    global _ingestion_queue
+    with _queue_lock:
+        if _ingestion_queue is not None:
+            _ingestion_queue.shutdown(wait=wait)
+            _ingestion_queue = None
+
+
+def requeue_pending_statements() -> int:
+    """Queue statements left pending or half-processed by a previous run.
+
+    Statements another server process is still working on (a recent claim) are
+    left to it, and each job claims its statement before parsing, so processes
+    starting together never ingest one twice.
+    """
+    db = SessionLocal()
+    try:
+        statement_ids = [
+            statement_id for (statement_id,) in db.query(Statement.id).filter(
+                claimable(datetime.utcnow())
+            ).all()
+        ]
+    finally:
+        db.close()
+
+    ingestion_queue = get_ingestion_queue()
+    for statement_id in statement_ids:
+        ingestion_queue.submit(statement_id)
+    return len(statement_ids)
@@ -0,0 +1,207 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Pattern, Tuple
+
+# Header/footer content of BBVA statements, matched against the lowercased line
+HEADER_FOOTER_PATTERNS = [
+    r'^periodo\s+del', r'^fecha de corte', r'^no\.?\s*de cuenta', r'^no\.?\s*de cliente',
+    r'^r\.?f\.?c\.?', r'^clabe', r'^sucursal', r'^direccion', r'^telefono',
+    r'^saldo', r'^depositos', r'^retiros', r'^total', r'^página', r'^pagina',
+    r'^concepto', r'^cantidad', r'^columna', r'^av\.?\s+paseo', r'^ciudad de',
+    r'^código postal', r'^régimen fiscal', r'^uso de cfdi', r'^exportación',
+    r'^no\.?\s*de serie', r'^fecha y hora', r'^estimado cliente',
+    r'^disposición oficial', r'^certificado', r'^vencimiento',
+    r'^tiene\s+\d+', r'^aclaración', r'^llamando al', r'^electrónico',
+    r'^www\.', r'^persona que', r'^número de cuenta',
+    r'^depósitos\s*/\s*abonos', r'^otros\s+cargos', r'^abonos\s*\(', r'^cargos\s*\(',
+    r'^total\s+importe', r'^total\s+movimientos', r'^nota\s*:', r'^la\s+gat',
+    r'^bbva\s+mexico', r'^institucion\s+de\s+banca', r'^grupo\s+financiero',
+    r'^\d{10,}',  # Very long numbers (account numbers, etc.)
+    r'^\(cid:',  # PDF encoding artifacts
+    r'^[a-z0-9+/=]{50,}',  # Base64-like strings (certificates, etc.)
+    r'^[a-z0-9+/=]{30,}\|',  # Base64 with pipe (certificates)
+    r'granada.*código\s+postal',  # Address patterns
+    r'col\.\s+juárez', r'alcaldía', r'paseo\s+de\s+la\s+reforma',
+]
+
+ADDRESS_PATTERNS = [r'cp\s*\d+', r'col\.', r'colonia', r'calle', r'avenida', r'av\.']
+
+# Summary lines (totals, percentages, etc.), unless they mention a known merchant
+SUMMARY_PATTERNS = [r'total', r'porcentaje', r'señala', r'columna', r'rendimiento', r'gat']
+SUMMARY_MERCHANTS = ('rest', 'uber', 'spei', 'starbucks')
+
+# Descriptions that are never real transactions
+INVALID_DESCRIPTION_PATTERNS = [
+    r'^\d+$',  # Just numbers
+    r'^no\.?\s*de',  # "No. de Cuenta", etc.
+    r'^r\.?f\.?c\.?',  # RFC
+    r'^clabe',  # CLABE
+    r'^página',  # Page numbers
+    r'^pagina',
+    r'^av\.?\s+paseo',  # Addresses
+    r'^ciudad de',
+    r'^código postal',
+    r'^\(cid:',  # PDF artifacts
+    r'^[a-z0-9+/=]{30,}$',  # Base64-like
+    r'^[a-z0-9+/=]{20,}\|',  # Base64 with pipe
+    r'depósitos\s*/\s*abonos',  # Summary lines
+    r'otros\s+cargos',  # Summary lines
+    r'total\s+importe',  # Summary lines
+    r'total\s+movimientos',  # Summary lines
+    r'nota\s*:',  # Notes
+    r'la\s+gat\s+real',  # Footer text
+    r'bbva\s+mexico',  # Footer text
+    r'institucion\s+de\s+banca',  # Footer text
+    r'grupo\s+financiero',  # Footer text
+    r'señala\s+con',  # Note text
+    r'columna.*porcentaje',  # Note text
+    r'granada.*código\s+postal',  # Address
+    r'col\.\s+juárez',  # Address
+    r'alcaldía',  # Address
+    r'estimado\s+cliente',  # Footer text
+    r'disposición\s+oficial',  # Footer text
+]
+
+LONG_CODE_PATTERN = r'^[A-Z0-9]{15,}$'  # MBAN01002510030092914825, 00638180010133810588
+NUMBER_WITH_LETTERS_PATTERN = r'^\d+[a-z]+$'  # 0109250dhl
+NAME_PATTERN = r'^[A-ZÁÉÍÓÚÑ\s]{10,}$'  # All caps names, multiple words
+LABEL_PATTERN = r'^(RFC|AUT|Referencia):'
+
+
+class RuleFamily:
+    """A list of regex rules merged into two alternations built once.
+
+    Rules anchored with ^ go into an alternation tried only at the start of the
+    line (`re.match`); the rest go into one `re.search`. Each rule gets a named
+    group so a match reports which rule fired.
+    """
+
+    def __init__(self, name: str, patterns: List[str]):
+        self.name = name
+        self.patterns: Dict[str, str] = {}
+        anchored, anywhere = [], []
+        for i, pattern in enumerate(patterns):
+            group = f"{name}_{i}"
+            self.patterns[group] = pattern
+            if pattern.startswith('^'):
+                anchored.append(f'(?P<{group}>{pattern[1:]})')
+            else:
+                anywhere.append(f'(?P<{group}>{pattern})')
+        self.anchored_re: Optional[Pattern] = re.compile('|'.join(anchored)) if anchored else None
+        self.anywhere_re: Optional[Pattern] = re.compile('|'.join(anywhere)) if anywhere else None
+
+    def match(self, text: str) -> Optional[str]:
+        """Return the pattern of a rule matching text, or None"""
+        if self.anchored_re is not None:
+            match = self.anchored_re.match(text)
+            if match:
+                return self.patterns[match.lastgroup]
+        if self.anywhere_re is not None:
+            match = self.anywhere_re.search(text)
+            if match:
+                return self.patterns[match.lastgroup]
+        return None
+
+
+class LineClassifier:
+    """Single-pass classifier for the line filters used by PDFParser.
+
+    Each rule family is compiled once (see RuleFamily), so a line costs a couple
+    of regex calls per family instead of one `re.search` per raw pattern.
+    `classify` returns the family that rejected the line (None if it should be
+    parsed) and `explain` also returns the specific pattern that matched.
+    """
+
+    LINE_RULES = ("header_footer", "short", "address", "summary", "reference", "label")
+
+    def __init__(self):
+        self.header_footer = RuleFamily("header_footer", HEADER_FOOTER_PATTERNS)
+        self.address = RuleFamily("address", ADDRESS_PATTERNS)
+        self.summary = RuleFamily("summary", SUMMARY_PATTERNS)
+        self.invalid_description = RuleFamily("invalid_description", INVALID_DESCRIPTION_PATTERNS)
+        self.long_code_re = re.compile(LONG_CODE_PATTERN)
+        self.number_with_letters_re = re.compile(NUMBER_WITH_LETTERS_PATTERN)
+        self.name_re = re.compile(NAME_PATTERN)
+        self.label_re = re.compile(LABEL_PATTERN, re.IGNORECASE)
+
+    def header_footer_match(self, line: str) -> Optional[Tuple[str, str]]:
+        """Return (family, pattern) if line is header/footer content that should be skipped"""
+        line_lower = line.lower()
+
+        pattern = self.header_footer.match(line_lower)
+        if pattern:
+            return "header_footer", pattern
+
+        # Skip lines that are mostly numbers or very short
+        if len(line.strip()) < 5:
+            return "short", "len < 5"
+
+        # Skip lines that look like addresses
+        pattern = self.address.match(line_lower)
+        if pattern:
+            return "address", pattern
+
+        # Skip summary lines (contain totals, percentages, etc.)
+        pattern = self.summary.match(line_lower)
+        if pattern and not any(merchant in line_lower for merchant in SUMMARY_MERCHANTS):
+            return "summary", pattern
+
+        return None
+
+    def is_reference_line(self, line: str) -> bool:
+        """Check if line is a reference/code line that should be skipped"""
+        line = line.strip()
+        line_lower = line.lower()
+
+        if line_lower.startswith('referencia'):
+            return True
+        if self.long_code_re.match(line):
+            return True
+        if len(line) < 20 and self.number_with_letters_re.match(line_lower):
+            return True
+        # The name pattern cannot match digits, so no separate digit check is needed
+        if self.name_re.match(line):
+            return True
+        return False
+
+    def explain(self, line: str) -> Optional[Tuple[str, str]]:
+        """Return (family, pattern) of the first rule that rejects a statement line"""
+        result = self.header_footer_match(line)
+        if result:
+            return result
+        if self.is_reference_line(line):
+            return "reference", "reference/code line"
+        match = self.label_re.match(line)
+        if match:
+            return "label", LABEL_PATTERN
+        return None
+
+    def classify(self, line: str) -> Optional[str]:
+        """Return the rule family that rejects a statement line, or None to keep it"""
+        result = self.explain(line)
+        return result[0] if result else None
+
+    def invalid_description_rule(self, description: str, amount: float) -> Optional[str]:
+        """Return why a parsed description/amount is not a real transaction, or None if valid"""
+        # Amount must be reasonable (between 1 and 10,000,000 MXN)
+        if amount < 1 or amount > 10000000:
+            return "amount_out_of_range"
+
+        # Description must have some text (not just numbers)
+        if len(description) < 5:
+            return "description_too_short"
+
+        # Skip if description is mostly numbers
+        num_chars = sum(c.isdigit() for c in description)
+        if num_chars > len(description) * 0.7:
+            return "description_mostly_digits"
+
+        if self.invalid_description.match(description.lower()):
+            return "invalid_description"
+        return None
+
+
+@lru_cache(maxsize=None)
+def get_line_classifier() -> LineClassifier:
+    """Process-wide classifier, compiled on first use"""
+    return LineClassifier()
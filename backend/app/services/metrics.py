@@ -0,0 +1,261 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Off: counters and timers become no-ops and /metrics is not mounted
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Seconds, from sub-millisecond pool checkouts up to the default 30 s pool timeout
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Seconds per ingestion stage, a long PDF can spend minutes in pdfplumber
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class Histogram:
+    """Fixed-bucket histogram, cheap enough to observe on every request"""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (inf if it is past the last bucket)"""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+                seen += count
+                if seen >= rank:
+                    return bound
+        return float("inf")
+
+    def snapshot(self) -> Dict:
+        """Cumulative bucket counts keyed by upper bound, like Prometheus `le` labels"""
+        with self._lock:
+            cumulative = {}
+            seen = 0
+            for bound, count in zip(self.buckets, self.counts):
+                seen += count
+                cumulative[f"{bound:g}"] = seen
+            cumulative["+Inf"] = self.count
+            return {"count": self.count, "sum": self.sum, "buckets": cumulative}
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), chr(92) + "n")}"'
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return f"{value:.17g}" if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """Named metrics plus collectors rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self.metrics: Dict[str, "Metric"] = {}
+        self.collectors: List[Callable[[], Iterable[str]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: "Metric") -> None:
+        with self._lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self.metrics[metric.name] = metric
+
+    def add_collector(self, collector: Callable[[], Iterable[str]]) -> None:
+        """Callable returning extra exposition lines at scrape time (e.g. pool stats)"""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class Metric:
+    """Base for named metrics with optional labels; children are created per label set"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), register: bool = True):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children: Dict[LabelValues, object] = {}
+        self._lock = threading.Lock()
+        if register:
+            registry.register(self)
+
+    def _child(self, labels: Dict[str, str]):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self.children.get(key)
+        if child is None:
+            with self._lock:
+                child = self.children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class _CounterValue:
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+
+class Counter(Metric):
+    """Monotonic counter, `inc(amount, **labels)`"""
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if not METRICS_ENABLED:
+            return
+        child = self._child(labels)
+        with child.lock:
+            child.value += amount
+
+    def value(self, **labels) -> float:
+        child = self.children.get(tuple(str(labels[name]) for name in self.labelnames))
+        return child.value if child is not None else 0.0
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, child in sorted(self.children.items()):
+            lines.append(f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(child.value)}")
+        return lines
+
+
+class HistogramMetric(Metric):
+    """Named, labelled Histogram, `observe(seconds, **labels)` or `with time(**labels):`"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, register: bool = True):
+        self.buckets = buckets
+        super().__init__(name, documentation, labelnames, register)
+
+    def _new_child(self):
+        return Histogram(self.buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        if METRICS_ENABLED:
+            self._child(labels).observe(value)
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        if not METRICS_ENABLED:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._child(labels).observe(time.perf_counter() - start)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, child in sorted(self.children.items()):
+            lines.extend(histogram_lines(self.name, child, dict(zip(self.labelnames, key))))
+        return lines
+
+
+def histogram_lines(name: str, histogram: Histogram, labels: Dict[str, str]) -> List[str]:
+    """Exposition lines (buckets, sum, count) of one Histogram"""
+    snapshot = histogram.snapshot()
+    lines = [
+        f"{name}_bucket{_format_labels({**labels, 'le': bound})} {count}"
+        for bound, count in snapshot["buckets"].items()
+    ]
+    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(snapshot['sum'])}")
+    lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+    return lines
+
+
+def gauge_lines(name: str, documentation: str, samples: Iterable[Tuple[Dict[str, str], float]],
+                type_name: str = "gauge") -> List[str]:
+    """Exposition lines for values read at scrape time (used by collectors)"""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {type_name}"]
+    lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+    return lines
+
+
+# Ingestion pipeline: per-stage timings and per-statement counts, recorded by
+# the dispatcher thread from the stats returned by the parse worker
+INGESTION_STAGE_SECONDS = HistogramMetric(
+    "finaice_ingestion_stage_seconds",
+    "Seconds spent per statement in each ingestion stage",
+    ("stage",),
+    buckets=STAGE_BUCKETS,
+)
+INGESTION_STATEMENTS = Counter(
+    "finaice_ingestion_statements_total", "Statements processed by outcome", ("status",)
+)
+INGESTION_FORMATS = Counter(
+    "finaice_ingestion_statement_formats_total", "Parsed statements by detected bank format", ("format",)
+)
+INGESTION_PAGES = Counter(
+    "finaice_ingestion_pages_total", "Statement pages seen, extracted or skipped", ("kind",)
+)
+INGESTION_LINES_SCANNED = Counter(
+    "finaice_ingestion_lines_scanned_total", "Non-empty lines scanned inside the movements section"
+)
+INGESTION_LINES_SKIPPED = Counter(
+    "finaice_ingestion_lines_skipped_total", "Lines dropped by the line classifier, by rule family", ("rule",)
+)
+INGESTION_TRANSACTIONS = Counter(
+    "finaice_ingestion_transactions_total",
+    "Parsed transactions accepted or rejected, with the rejection reason",
+    ("outcome", "reason"),
+)
+CATEGORY_MEMO_LOOKUPS = Counter(
+    "finaice_category_memo_lookups_total", "Merchant-key category memo lookups by result", ("result",)
+)
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from app.services.pdf_parser import PDF_EXTRACT_MODE, PDFParser
+from app.services.ai_categorizer import AI_CATEGORIZATION, AICategorizer
+
+load_dotenv()
+
+# "memory" (LRU in the API process), "disk" (shared directory) or "none"
+PARSE_CACHE_BACKEND = os.getenv("PARSE_CACHE_BACKEND", "memory")
+PARSE_CACHE_MAX_BYTES = int(os.getenv("PARSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+PARSE_CACHE_DIR = os.getenv("PARSE_CACHE_DIR", ".parse_cache")
+
+
+def content_hash(pdf_content: bytes) -> str:
+    """SHA-256 of the raw PDF bytes"""
+    return hashlib.sha256(pdf_content).hexdigest()
+
+
+def _cache_key(pdf_hash: str) -> str:
+    # Parser or categorizer changes must never serve stale results
+    # Keyword and AI categorization (and text and layout extraction) give different
+    # results for the same PDF
+    layout = "-layout" if PDF_EXTRACT_MODE == "layout" else ""
+    return f"{pdf_hash}-p{PDFParser.VERSION}{layout}-c{AICategorizer.VERSION}{'-ai' if AI_CATEGORIZATION else ''}"
+
+
+def _encode(transactions: List[Dict]) -> bytes:
+    return json.dumps(
+        [{**t, "date": t["date"].isoformat()} for t in transactions],
+        ensure_ascii=False
+    ).encode("utf-8")
+
+
+def _decode(data: bytes) -> List[Dict]:
+    transactions = json.loads(data.decode("utf-8"))
+    for t in transactions:
+        t["date"] = datetime.fromisoformat(t["date"])
+    return transactions
+
+
+class MemoryLRUBackend:
+    """In-memory LRU bounded by the total size of the stored entries"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self.size = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        data = self.entries.get(key)
+        if data is not None:
+            self.entries.move_to_end(key)
+        return data
+
+    def set(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self.entries[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class DiskBackend:
+    """One file per entry in a directory, least recently used files evicted by size"""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self.size = sum(os.path.getsize(path) for path in self._files())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _files(self) -> List[str]:
+        return [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(".json")
+        ]
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # mtime doubles as the LRU timestamp
+        return data
+
+    def set(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        if os.path.exists(path):
+            self.size -= os.path.getsize(path)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        files = sorted(self._files(), key=os.path.getmtime)
+        self.size = sum(os.path.getsize(path) for path in files)
+        for path in files:
+            if self.size <= self.max_bytes:
+                break
+            self.size -= os.path.getsize(path)
+            os.remove(path)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._files())
+
+
+class ParseCache:
+    """Parsed and categorized transactions keyed by PDF content hash and parser versions"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, pdf_hash: str) -> Optional[List[Dict]]:
+        with self._lock:
+            data = self.backend.get(_cache_key(pdf_hash)) if self.backend is not None else None
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return _decode(data)
+
+    def set(self, pdf_hash: str, transactions: List[Dict]) -> None:
+        if self.backend is None:
+            return
+        data = _encode(transactions)
+        with self._lock:
+            self.backend.set(_cache_key(pdf_hash), data)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__ if self.backend is not None else None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self.backend) if self.backend is not None else 0,
+                "bytes": self.backend.size if self.backend is not None else 0,
+                "evictions": self.backend.evictions if self.backend is not None else 0,
+            }
+
+
+_parse_cache: Optional[ParseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_parse_cache() -> ParseCache:
+    global _parse_cache
+    with _cache_lock:
+        if _parse_cache is None:
+            if PARSE_CACHE_BACKEND == "disk":
+                backend = DiskBackend(PARSE_CACHE_DIR, PARSE_CACHE_MAX_BYTES)
+            elif PARSE_CACHE_BACKEND == "memory":
+                backend = MemoryLRUBackend(PARSE_CACHE_MAX_BYTES)
+            else:
+                backend = None
+            _parse_cache = ParseCache(backend)
+        return _parse_cache
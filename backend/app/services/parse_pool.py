@@ -0,0 +1,213 @@
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Worker processes shared by the ingestion queue and `upload?wait=true`, and the
+# wall-clock limit for one statement parse once a worker picks it up (0 = no limit)
+PARSE_POOL_WORKERS = int(os.getenv("PARSE_POOL_WORKERS", os.getenv("INGESTION_WORKERS", "2")))
+PARSE_TIMEOUT_SECONDS = float(os.getenv("PARSE_TIMEOUT_SECONDS", "120"))
+# How often a caller whose parse is still queued checks whether a worker started it
+START_POLL_SECONDS = 0.25
+
+# Set in each worker by _init_worker: where tasks report (task id, start time)
+_started_queue = None
+
+
+class ParseTimeout(Exception):
+    """A parse ran past PARSE_TIMEOUT_SECONDS and its worker processes were killed"""
+
+
+def warm_worker() -> None:
+    """Pool initializer: import pdfplumber and compile the parser and categorizer patterns"""
+    import pdfplumber  # noqa: F401
+    from app.services.keyword_categorizer import get_keyword_categorizer
+    from app.services.pdf_parser import PDFParser
+    PDFParser()
+    get_keyword_categorizer()
+
+
+def _init_worker(started_queue, workers: int) -> None:
+    global _started_queue
+    _started_queue = started_queue
+    # Every worker may categorize with OpenAI at once: split the request rate between them
+    from app.services.ai_scheduler import set_process_share
+    set_process_share(workers)
+    warm_worker()
+
+
+def _run_task(task_id: int, fn: Callable, *args):
+    """Report when a worker picks the task up, so the timeout leaves out time spent queued"""
+    _started_queue.put((task_id, time.time()))
+    return fn(*args)
+
+
+def _worker_pid(_: int) -> int:
+    return os.getpid()
+
+
+class ParsePool:
+    """ProcessPoolExecutor for CPU-bound statement parsing, with timeouts that kill runaway PDFs.
+
+    The timeout counts from when a worker starts the parse, not from submit: parses
+    queue behind each other when more statements arrive than there are workers.
+    A running task cannot be cancelled, so when a parse times out the whole pool
+    is replaced and its processes are terminated. Parses that were in flight on the
+    killed pool get BrokenProcessPool and are retried once on the new one (so is a
+    parse whose worker crashed, and one that was submitted to or queued on a pool
+    another caller was replacing).
+    """
+
+    def __init__(self, workers: int = PARSE_POOL_WORKERS, timeout: float = PARSE_TIMEOUT_SECONDS):
+        self.workers = max(1, workers)
+        self.timeout = timeout if timeout > 0 else None
+        self.generation = 0
+        self.timeouts = 0
+        self.recycles = 0
+        self._lock = threading.Lock()
+        self._task_ids = itertools.count()
+        # Start times reported by workers, by task id; drained by whichever caller polls first
+        self._started: Dict[int, float] = {}
+        self._started_lock = threading.Lock()
+        self._executor, self._started_queue = self._new_executor()
+
+    def _new_executor(self) -> Tuple[ProcessPoolExecutor, object]:
+        # spawn keeps workers free of the server's threads, sockets and DB connections
+        context = multiprocessing.get_context("spawn")
+        # One queue per pool: a worker killed mid-put cannot leave the next pool's queue locked
+        started_queue = context.SimpleQueue()
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(started_queue, self.workers)
+        )
+        return executor, started_queue
+
+    def warm(self) -> int:
+        """Start every worker process now (imports and pattern compilation included), returns how many run"""
+        with self._lock:
+            executor = self._executor
+        # Workers are spawned on demand, one per task that finds no idle worker
+        list(executor.map(_worker_pid, range(self.workers)))
+        return len(executor._processes or {})
+
+    def _current(self) -> Tuple[ProcessPoolExecutor, object, int]:
+        with self._lock:
+            return self._executor, self._started_queue, self.generation
+
+    def run(self, fn: Callable, *args):
+        """Run fn(*args) in a worker and wait for it, called from threads (never the event loop)"""
+        for attempt in range(2):
+            executor, started_queue, generation = self._current()
+            task_id = next(self._task_ids)
+            try:
+                future: Future = executor.submit(_run_task, task_id, fn, *args)
+            except BrokenProcessPool:
+                if attempt:
+                    raise
+                self._recycle(generation)
+                continue
+            except RuntimeError:
+                # Shut down by another caller's recycle after _current() returned it:
+                # retry on the pool that replaced it (fails again if the app is stopping)
+                if attempt:
+                    raise
+                continue
+            try:
+                return self._wait(future, task_id, started_queue)
+            except FutureTimeoutError:
+                self._timed_out(generation)
+            except BrokenProcessPool:
+                if attempt:
+                    raise
+                self._recycle(generation)
+            except CancelledError:
+                # Still queued when another caller's recycle cancelled the old pool's futures
+                if attempt:
+                    raise
+
+    def _wait(self, future: Future, task_id: int, started_queue):
+        """future.result(), raising FutureTimeoutError once it has run for self.timeout in a worker"""
+        if self.timeout is None:
+            return future.result()
+        deadline = None
+        try:
+            while True:
+                if deadline is None:
+                    started_at = self._started_at(task_id, started_queue)
+                    if started_at is not None:
+                        deadline = started_at + self.timeout
+                if deadline is not None:
+                    return future.result(timeout=max(0.0, deadline - time.time()))
+                try:
+                    return future.result(timeout=START_POLL_SECONDS)
+                except FutureTimeoutError:
+                    continue  # still queued, or started since the last check
+        finally:
+            # The start report is written before the task runs, so it is readable by now
+            self._started_at(task_id, started_queue)
+            with self._started_lock:
+                self._started.pop(task_id, None)
+
+    def _started_at(self, task_id: int, started_queue) -> Optional[float]:
+        with self._started_lock:
+            while not started_queue.empty():
+                started_id, started_at = started_queue.get()
+                self._started[started_id] = started_at
+            return self._started.get(task_id)
+
+    def _timed_out(self, generation: int) -> None:
+        with self._lock:
+            self.timeouts += 1
+        self._recycle(generation)
+        raise ParseTimeout(f"Parsing took longer than {self.timeout:g}s")
+
+    def _recycle(self, generation: int) -> None:
+        """Replace the pool unless another caller already did, and kill the old workers"""
+        with self._lock:
+            if generation != self.generation:
+                return
+            old = self._executor
+            self._executor, self._started_queue = self._new_executor()
+            self.generation += 1
+            self.recycles += 1
+        for process in list((old._processes or {}).values()):
+            process.terminate()
+        old.shutdown(wait=False, cancel_futures=True)
+        threading.Thread(target=self.warm, name="parse-pool-warm", daemon=True).start()
+
+    def stats(self) -> Dict:
+        return {"workers": self.workers, "timeout_seconds": self.timeout, "timeouts": self.timeouts, "recycles": self.recycles}
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor = self._executor
+        executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+_parse_pool: Optional[ParsePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> ParsePool:
+    global _parse_pool
+    with _pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ParsePool()
+        return _parse_pool
+
+
+def shutdown_parse_pool(wait: bool = True) -> None:
+    global _parse_pool
+    with _pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown(wait=wait)
+            _parse_pool = None
@@ -0,0 +1,15 @@
+"""Bank statement format plugins, see StatementFormat and the registry"""
+from app.services.parsers.base import StatementFormat, StatementScanState
+from app.services.parsers.bbva import BBVAFormat
+from app.services.parsers.generic import GenericFormat
+from app.services.parsers.registry import (
+    STATEMENT_FORMATS, format_names, get_format, register_format, sniff_format,
+)
+
+register_format(BBVAFormat())
+register_format(GenericFormat())
+
+__all__ = [
+    "STATEMENT_FORMATS", "BBVAFormat", "GenericFormat", "StatementFormat", "StatementScanState",
+    "format_names", "get_format", "register_format", "sniff_format",
+]
@@ -0,0 +1,202 @@
+import re
+import time
+import unicodedata
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from app.services.line_classifier import LineClassifier, get_line_classifier
+from app.services.metrics import METRICS_ENABLED
+
+# Patterns shared by the bank formats, compiled once per process
+AMOUNT_RE = re.compile(r'\d{1,3}(?:,\d{3})*\.\d{2}|\d+\.\d{2}')
+PERIOD_RE = re.compile(r'DEL\s+(\d{2})/(\d{2})/(\d{4})', re.IGNORECASE)
+WHITESPACE_RE = re.compile(r'\s+')
+AMOUNT_WORD_RE = re.compile(r'-?\$?(?:\d{1,3}(?:,\d{3})*|\d+)\.\d{2}')
+MONTH_ABBR_RE = re.compile(r'(\d{2})/([A-Z]{3})')
+NUMERIC_DATE_FORMATS = [
+    (re.compile(r'\d{2}/\d{2}/\d{4}'), '%d/%m/%Y'),
+    (re.compile(r'\d{4}-\d{2}-\d{2}'), '%Y-%m-%d'),
+    (re.compile(r'\d{2}-\d{2}-\d{4}'), '%d-%m-%Y'),
+]
+
+MONTHS = {
+    'ENE': 1, 'FEB': 2, 'MAR': 3, 'ABR': 4, 'MAY': 5, 'JUN': 6,
+    'JUL': 7, 'AGO': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DIC': 12
+}
+
+
+def parse_date(date_str: str, year: int = None) -> Optional[datetime]:
+    """Parse a DD/MMM (Spanish month, `year` or the current year) or numeric date, None if invalid"""
+    date_str = date_str.strip()
+
+    month_match = MONTH_ABBR_RE.search(date_str)
+    if month_match:
+        day = int(month_match.group(1))
+        month = MONTHS.get(month_match.group(2))
+        if month:
+            try:
+                return datetime(year if year is not None else datetime.now().year, month, day)
+            except ValueError:
+                pass
+
+    for pattern, date_format in NUMERIC_DATE_FORMATS:
+        match = pattern.search(date_str)
+        if match:
+            try:
+                return datetime.strptime(match.group(), date_format)
+            except ValueError:
+                continue
+    return None
+
+
+def parse_amount(amount_str: str) -> float:
+    """Parse an amount string ("1,234.56", "$84.00") to float, 0.0 if it is not a number"""
+    cleaned = re.sub(r'[^\d.-]', '', amount_str.replace(',', ''))
+    try:
+        return float(cleaned)
+    except ValueError:
+        return 0.0
+
+
+class LayoutLine(str):
+    """A line of statement text that keeps its words' x-coordinates (layout extraction mode).
+
+    It is still a str, so formats that only read text parse it unchanged.
+    `words` holds (text, x0, x1) per word, left to right.
+    """
+
+    def __new__(cls, text: str, words: Sequence[Tuple[str, float, float]] = ()):
+        line = super().__new__(cls, text)
+        line.words = list(words)
+        return line
+
+    def __getnewargs__(self):
+        return str(self), self.words
+
+
+def _header_key(text: str) -> str:
+    """Header words are compared without case, accents or punctuation ("OPERACIÓN" -> "operacion")"""
+    text = unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode()
+    return re.sub(r'[^a-z]', '', text)
+
+
+class ColumnLayout:
+    """Amount columns of a statement's movements table, found once on its header row.
+
+    Amounts are right-aligned, so each column is keyed by its header's right edge
+    and the bins are split halfway between neighbouring columns. Looking up the
+    column of a word is a bisect on its right edge.
+    """
+
+    def __init__(self, columns: Sequence[Tuple[float, str]]):
+        columns = sorted(columns)
+        self.kinds = [kind for _, kind in columns]
+        edges = [x1 for x1, _ in columns]
+        self.boundaries = [(left + right) / 2 for left, right in zip(edges, edges[1:])]
+        # Amounts further left than one column width belong to the description
+        width = edges[1] - edges[0] if len(edges) > 1 else edges[0]
+        self.left_limit = edges[0] - width
+
+    @classmethod
+    def from_header(cls, line: LayoutLine, headers: Dict[str, str]) -> Optional["ColumnLayout"]:
+        """Columns from a header row, None unless it names both the charge and credit columns"""
+        columns = []
+        for text, _, x1 in line.words:
+            kind = headers.get(_header_key(text))
+            if kind:
+                columns.append((x1, kind))
+        kinds = {kind for _, kind in columns}
+        if "charge" in kinds and "credit" in kinds:
+            return cls(columns)
+        return None
+
+    def amounts(self, line: LayoutLine) -> Optional[Dict[str, str]]:
+        """First amount word in each column of a line, e.g. {"charge": "84.00", "balance": "832.22"}.
+
+        None when the line does not fit the columns (an amount right before them,
+        in the description area), so the caller can fall back to the text.
+        """
+        found: Dict[str, str] = {}
+        # Right to left, stopping at the description: most words are never looked at
+        for text, _, x1 in reversed(line.words):
+            if x1 < self.left_limit:
+                if AMOUNT_WORD_RE.fullmatch(text):
+                    return None
+                break
+            if AMOUNT_WORD_RE.fullmatch(text):
+                found[self.kinds[bisect_right(self.boundaries, x1)]] = text
+        return found
+
+
+class StatementScanState:
+    """Position of a format's state machine while scanning a statement"""
+
+    def __init__(self):
+        self.current_date = None
+        self.current_year = None
+        self.in_section = False
+        self.ended = False
+        # Amount columns of the movements table (layout mode), detected once per document
+        self.columns: Optional[ColumnLayout] = None
+        # Per-statement counts for the ingestion metrics
+        self.lines_scanned = 0
+        self.lines_skipped: Dict[str, int] = {}
+        self.rejected: Dict[str, int] = {}
+        self.filter_seconds = 0.0
+        self.scan_seconds = 0.0
+
+
+class StatementFormat:
+    """Parser plugin for one bank's statement layout.
+
+    `sniff` gets the text of the first page only and says whether the statement
+    is in this format, so picking a plugin costs a single page extraction.
+    `scan` runs the plugin's state machine over lines, appending transaction
+    dicts ({"date", "description", "amount", "transaction_type", "original_text"})
+    and setting `state.ended` once the rest of the document can be ignored.
+    `skip_page` lets PDFParser drop whole pages before the transactions start.
+    In layout mode the lines are LayoutLines, which a format can use to read
+    amounts by column instead of guessing from the text.
+    """
+
+    name = "base"
+
+    def __init__(self, classifier: Optional[LineClassifier] = None):
+        self.classifier = classifier or get_line_classifier()
+
+    def sniff(self, first_page_text: str) -> bool:
+        raise NotImplementedError
+
+    def skip_page(self, text: str, state: StatementScanState) -> bool:
+        """Whether a page can be skipped without scanning its lines"""
+        return False
+
+    def scan(self, lines: Iterable[str], state: StatementScanState, transactions: List[Dict]) -> None:
+        raise NotImplementedError
+
+    def parse(self, lines: Iterable[str]) -> List[Dict]:
+        """Parse transactions from a stream of statement lines"""
+        transactions = []
+        self.scan(lines, StatementScanState(), transactions)
+        return transactions
+
+    def _skip_line(self, line: str, state: StatementScanState) -> bool:
+        """Run the line classifier, counting (and timing) skipped lines for the ingestion metrics"""
+        if METRICS_ENABLED:
+            filter_start = time.perf_counter()
+            rule = self.classifier.classify(line)
+            state.filter_seconds += time.perf_counter() - filter_start
+        else:
+            rule = self.classifier.classify(line)
+        if rule:
+            state.lines_skipped[rule] = state.lines_skipped.get(rule, 0) + 1
+            return True
+        return False
+
+    def _rejected(self, description: str, amount: float, state: StatementScanState) -> bool:
+        """Validate a parsed description/amount, counting the rejection reason"""
+        rejection = self.classifier.invalid_description_rule(description, amount)
+        if rejection:
+            state.rejected[rejection] = state.rejected.get(rejection, 0) + 1
+            return True
+        return False
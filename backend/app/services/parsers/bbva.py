@@ -0,0 +1,157 @@
+import re
+from typing import Dict, Iterable, List
+from app.services.parsers.base import (
+    AMOUNT_RE, PERIOD_RE, WHITESPACE_RE, ColumnLayout, StatementFormat, StatementScanState, parse_amount,
+    parse_date,
+)
+
+# BBVA line patterns, compiled once per process
+BBVA_DATE_PREFIX_RE = re.compile(r'^(\d{2}/[A-Z]{3})(?:\s+(\d{2}/[A-Z]{3}))?')  # "03/OCT 03/OCT"
+BBVA_DOUBLE_DATE_RE = re.compile(r'^\d{2}/[A-Z]{3}\s+\d{2}/[A-Z]{3}\s*')
+BBVA_SINGLE_DATE_RE = re.compile(r'^\d{2}/[A-Z]{3}\s*')
+BBVA_SNIFF_RE = re.compile(r'bbva\s+(?:m[eé]xico|bancomer)|bancomer')
+SECTION_START_MARKER = 'detalle de movimientos realizados'
+# Movements table header words (normalized) and the column each one names
+BBVA_COLUMN_HEADERS = {
+    "cargos": "charge", "abonos": "credit", "saldo": "balance", "operacion": "balance", "liquidacion": "balance",
+}
+
+
+class BBVAFormat(StatementFormat):
+    """BBVA México: DD/MMM operation and settlement dates, movements between
+    "Detalle de Movimientos Realizados" and the movement totals"""
+
+    name = "bbva"
+
+    def sniff(self, first_page_text: str) -> bool:
+        return BBVA_SNIFF_RE.search(first_page_text.lower()) is not None
+
+    def skip_page(self, text: str, state: StatementScanState) -> bool:
+        # Leading pages (summary, account info) only matter for the statement year
+        if state.in_section or SECTION_START_MARKER in text.lower():
+            return False
+        if state.current_year is None:
+            period_match = PERIOD_RE.search(text)
+            if period_match:
+                state.current_year = int(period_match.group(3))
+        return True
+
+    def scan(self, lines: Iterable[str], state: StatementScanState, transactions: List[Dict]) -> None:
+        """Run the movements-section state machine over lines, appending to transactions"""
+        for raw_line in lines:
+            line = raw_line.strip()
+            if not line:
+                continue
+
+            # Try to extract year from statement period (header precedes the movements)
+            if state.current_year is None:
+                period_match = PERIOD_RE.search(line)
+                if period_match:
+                    state.current_year = int(period_match.group(3))
+
+            # Look for start of transactions section
+            if SECTION_START_MARKER in line.lower():
+                state.in_section = True
+                continue
+
+            # Look for end of transactions section
+            if state.in_section and ('total de movimientos' in line.lower() or
+                                     'total movimientos' in line.lower() or
+                                     'tOTAL IMPORTE' in line or
+                                     'TOTAL IMPORTE CARGOS' in line):
+                state.ended = True
+                break
+
+            # Only process if we're in the transactions section
+            if not state.in_section:
+                continue
+
+            # Layout mode: the first table header fixes the amount columns for the
+            # document, after that a line without a charge or credit is not a movement.
+            # Lines that do not fit the columns are parsed from their text.
+            amounts = None
+            if getattr(raw_line, "words", None) is not None:
+                if state.columns is None:
+                    state.columns = ColumnLayout.from_header(raw_line, BBVA_COLUMN_HEADERS)
+                    if state.columns is not None:
+                        continue
+                else:
+                    amounts = state.columns.amounts(raw_line)
+                    if amounts is not None and "charge" not in amounts and "credit" not in amounts:
+                        state.lines_scanned += 1
+                        state.lines_skipped["no_amount"] = state.lines_skipped.get("no_amount", 0) + 1
+                        continue
+
+            # Skip header/footer content, reference/code lines and RFC/AUT labels (not
+            # needed in layout mode: an amount in the CARGOS/ABONOS column makes a movement)
+            state.lines_scanned += 1
+            if amounts is None and self._skip_line(line, state):
+                continue
+
+            # BBVA format: "03/OCT 03/OCT" or "02/OCT 01/OCT" at start of line
+            bbva_date_match = BBVA_DATE_PREFIX_RE.match(line)
+            if bbva_date_match:
+                date_str = bbva_date_match.group(1)  # Use first date (OPER date)
+                date_match = parse_date(date_str, state.current_year)
+                if date_match:
+                    state.current_date = date_match
+
+            # If we found a date, this might be a transaction line
+            if state.current_date:
+                # Remove date from line to get description and amounts
+                desc_line = BBVA_DOUBLE_DATE_RE.sub('', line)
+                desc_line = BBVA_SINGLE_DATE_RE.sub('', desc_line)
+                desc_line = desc_line.strip()
+
+                # Look for amounts in the line (CARGOS or ABONOS)
+                # Pattern: description followed by amounts (could be multiple: amount, balance, balance)
+                # Example: "SPEI ENVIADO NU MEXICO 500.00 832.22 832.22"
+                # Example: "CARNICERIA LA TAPATIA 84.00"
+                if amounts is not None:
+                    # Layout mode: the column says whether it is a charge or a credit
+                    transaction_amount_str = amounts.get("charge") or amounts["credit"]
+                    column_type = "expense" if "charge" in amounts else "income"
+                else:
+                    # The first amount is usually the transaction amount (CARGOS or ABONOS)
+                    # Subsequent amounts are usually balances (OPERACION, SALDO LIQUIDACION)
+                    line_amounts = AMOUNT_RE.findall(desc_line)
+                    transaction_amount_str = line_amounts[0] if line_amounts else None
+                    column_type = None
+
+                if transaction_amount_str:
+                    transaction_amount = parse_amount(transaction_amount_str)
+
+                    # Extract description (everything before the first amount)
+                    amount_pos = desc_line.find(transaction_amount_str)
+                    if amount_pos > 0:
+                        description = desc_line[:amount_pos].strip()
+                    else:
+                        description = desc_line.strip()
+
+                    # Clean description
+                    description = WHITESPACE_RE.sub(' ', description)
+                    description = description.strip()
+
+                    # Validate transaction
+                    if not self._rejected(description, transaction_amount, state):
+                        # Determine transaction type
+                        desc_lower = description.lower()
+
+                        # The column when known (layout mode), else SPEI ENVIADO = expense,
+                        # SPEI RECIBIDO = income
+                        if column_type:
+                            transaction_type = column_type
+                        elif 'spei recibido' in desc_lower or 'recibido' in desc_lower:
+                            transaction_type = "income"
+                        else:
+                            # Default: most transactions are expenses unless they're clearly
+                            # income (the CARGOS/ABONOS columns are lost in text extraction)
+                            transaction_type = "expense"
+
+                        transactions.append({
+                            "date": state.current_date,
+                            "description": description,
+                            "amount": transaction_amount,
+                            "transaction_type": transaction_type,
+                            "original_text": line[:150]
+                        })
@@ -0,0 +1,96 @@
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from app.services.parsers.base import (
+    MONTHS, PERIOD_RE, WHITESPACE_RE, StatementFormat, StatementScanState, parse_amount,
+)
+
+# A transaction line starts with a date: DD/MM/YYYY, DD-MM-YY, YYYY-MM-DD,
+# DD/MMM, DD MMM or DD-MMM-YYYY (Spanish or English month abbreviations)
+GENERIC_DATE_RE = re.compile(
+    r'^(?:(?P<day>\d{1,2})[/.-](?P<month>\d{1,2})[/.-](?P<year>\d{4}|\d{2})'
+    r'|(?P<iso_year>\d{4})-(?P<iso_month>\d{1,2})-(?P<iso_day>\d{1,2})'
+    r'|(?P<abbr_day>\d{1,2})[/\s-](?P<abbr_month>[A-Za-z]{3})\.?(?:[/\s-](?P<abbr_year>\d{4}))?)(?=\s|$)'
+)
+SIGNED_AMOUNT_RE = re.compile(r'(-)?\$?\s?(\d{1,3}(?:,\d{3})*\.\d{2}|\d+\.\d{2})')
+INCOME_KEYWORDS = (
+    'recibido', 'abono', 'deposito', 'depósito', 'nomina', 'nómina', 'devolucion', 'devolución', 'reembolso',
+)
+GENERIC_MONTHS = {**MONTHS, 'JAN': 1, 'APR': 4, 'AUG': 8, 'DEC': 12}
+
+
+def _date_from_match(match: re.Match, default_year: int) -> Optional[datetime]:
+    try:
+        if match.group("day"):
+            year = int(match.group("year"))
+            return datetime(year + 2000 if year < 100 else year, int(match.group("month")), int(match.group("day")))
+        if match.group("iso_year"):
+            return datetime(int(match.group("iso_year")), int(match.group("iso_month")), int(match.group("iso_day")))
+        month = GENERIC_MONTHS.get(match.group("abbr_month").upper())
+        if month is None:
+            return None
+        year = int(match.group("abbr_year")) if match.group("abbr_year") else default_year
+        return datetime(year, month, int(match.group("abbr_day")))
+    except ValueError:
+        return None
+
+
+class GenericFormat(StatementFormat):
+    """Fallback for banks without a plugin: every line that starts with a date and
+    has an amount is a transaction, on every page"""
+
+    name = "generic"
+
+    def sniff(self, first_page_text: str) -> bool:
+        return True
+
+    def scan(self, lines: Iterable[str], state: StatementScanState, transactions: List[Dict]) -> None:
+        for raw_line in lines:
+            line = raw_line.strip()
+            if not line:
+                continue
+
+            if state.current_year is None:
+                period_match = PERIOD_RE.search(line)
+                if period_match:
+                    state.current_year = int(period_match.group(3))
+
+            state.lines_scanned += 1
+            date_match = GENERIC_DATE_RE.match(line)
+            if not date_match:
+                state.lines_skipped["undated"] = state.lines_skipped.get("undated", 0) + 1
+                continue
+            if self._skip_line(line, state):
+                continue
+            date = _date_from_match(date_match, state.current_year or datetime.now().year)
+            if date is None:
+                state.rejected["invalid_date"] = state.rejected.get("invalid_date", 0) + 1
+                continue
+
+            # A second (settlement) date may follow the operation date
+            rest = line[date_match.end():].strip()
+            second_date = GENERIC_DATE_RE.match(rest)
+            if second_date:
+                rest = rest[second_date.end():].strip()
+
+            # The first amount is the movement, any after it are balances
+            amount_match = SIGNED_AMOUNT_RE.search(rest)
+            if not amount_match:
+                continue
+            amount = parse_amount(amount_match.group(2))
+            description = WHITESPACE_RE.sub(' ', rest[:amount_match.start()]).strip()
+            if self._rejected(description, amount, state):
+                continue
+
+            desc_lower = description.lower()
+            if not amount_match.group(1) and any(keyword in desc_lower for keyword in INCOME_KEYWORDS):
+                transaction_type = "income"
+            else:
+                transaction_type = "expense"
+            transactions.append({
+                "date": date,
+                "description": description,
+                "amount": amount,
+                "transaction_type": transaction_type,
+                "original_text": line[:150]
+            })
@@ -0,0 +1,31 @@
+from typing import Dict, List
+from app.services.parsers.base import StatementFormat
+
+# Formats in sniffing order; the generic fallback is always tried last
+STATEMENT_FORMATS: Dict[str, StatementFormat] = {}
+FALLBACK_FORMAT = "generic"
+
+
+def register_format(statement_format: StatementFormat) -> StatementFormat:
+    """Add a bank format plugin (replacing one with the same name)"""
+    STATEMENT_FORMATS[statement_format.name] = statement_format
+    return statement_format
+
+
+def get_format(name: str) -> StatementFormat:
+    try:
+        return STATEMENT_FORMATS[name]
+    except KeyError:
+        raise ValueError(f"Unknown statement format: {name}") from None
+
+
+def format_names() -> List[str]:
+    return list(STATEMENT_FORMATS)
+
+
+def sniff_format(first_page_text: str) -> StatementFormat:
+    """The first registered format that recognizes the first page, else the generic fallback"""
+    for name, statement_format in STATEMENT_FORMATS.items():
+        if name != FALLBACK_FORMAT and statement_format.sniff(first_page_text):
+            return statement_format
+    return get_format(FALLBACK_FORMAT)
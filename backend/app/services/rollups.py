@@ -0,0 +1,329 @@
+"""Monthly per-category rollups of the transactions table.
+
+`monthly_category_rollups` holds one row per (user_id, month, category,
+transaction_type) with the sum and count of the matching transactions.
+Ingestion, statement deletion and transaction edits apply deltas to it in the
+same database transaction as the change itself, and the read endpoints answer
+from it for the whole months of a date window (see `summarize_range`).
+
+Consistency check and rebuild, from the backend directory:
+
+    python -m app.services.rollups check [--user-id 1]
+    python -m app.services.rollups rebuild [--user-id 1]
+"""
+import argparse
+import math
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import String, and_, cast, delete, extract, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.models import MonthlyCategoryRollup, Transaction
+
+load_dotenv()
+
+# Set to false to aggregate the raw transactions on every request instead
+ROLLUPS_ENABLED = os.getenv("ROLLUPS_ENABLED", "true").lower() == "true"
+
+# (month "YYYY-MM", category ("" if uncategorized), transaction_type)
+RollupKey = Tuple[str, str, str]
+
+
+def month_key(dialect_name: str):
+    """SQL expression turning Transaction.date into a "YYYY-MM" string"""
+    if dialect_name == "postgresql":
+        return func.to_char(Transaction.date, "YYYY-MM")
+    if dialect_name == "sqlite":
+        return func.strftime("%Y-%m", Transaction.date)
+    if dialect_name in ("mysql", "mariadb"):
+        return func.date_format(Transaction.date, "%Y-%m")
+    return func.concat(
+        cast(extract("year", Transaction.date), String), "-",
+        func.lpad(cast(extract("month", Transaction.date), String), 2, "0")
+    )
+
+
+def _grouped_transactions(db: Session, *conditions):
+    """(month, category, type, sum, count) of the transactions matching conditions"""
+    month = month_key(db.get_bind().dialect.name)
+    category = func.coalesce(Transaction.category, "")
+    return select(
+        month, category, Transaction.transaction_type,
+        func.sum(Transaction.amount), func.count(Transaction.id)
+    ).where(*conditions).group_by(month, category, Transaction.transaction_type)
+
+
+def utc_naive(date: datetime) -> datetime:
+    """date the way transactions store it: naive UTC (aware datetimes are converted)"""
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return date
+
+
+def add_delta(
+    deltas: Dict[RollupKey, List],
+    date: datetime,
+    category: Optional[str],
+    transaction_type: str,
+    amount: float,
+    sign: int = 1
+) -> None:
+    """Accumulate one transaction (sign=1) or its removal (sign=-1) into deltas"""
+    date = utc_naive(date)
+    delta = deltas.setdefault((date.strftime("%Y-%m"), category or "", transaction_type), [0.0, 0])
+    delta[0] += sign * amount
+    delta[1] += sign
+
+
+def apply_deltas(db: Session, user_id: int, deltas: Dict[RollupKey, List]) -> None:
+    """Add deltas to a user's rollup rows. Nothing is committed here."""
+    values = [
+        {
+            "user_id": user_id,
+            "month": month,
+            "category": category,
+            "transaction_type": transaction_type,
+            "total": total,
+            "count": count,
+        }
+        for (month, category, transaction_type), (total, count) in deltas.items()
+        if count or total
+    ]
+    if not values:
+        return
+
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name in ("postgresql", "sqlite"):
+        # Atomic upsert, concurrent ingestion jobs for one user cannot lose updates
+        insert_fn = postgresql_insert if dialect_name == "postgresql" else sqlite_insert
+        table = MonthlyCategoryRollup.__table__
+        stmt = insert_fn(table).values(values)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["user_id", "month", "category", "transaction_type"],
+            set_={
+                "total": table.c.total + stmt.excluded.total,
+                "count": table.c.count + stmt.excluded.count,
+            }
+        ))
+    else:
+        for value in values:
+            rollup = db.query(MonthlyCategoryRollup).filter(
+                MonthlyCategoryRollup.user_id == user_id,
+                MonthlyCategoryRollup.month == value["month"],
+                MonthlyCategoryRollup.category == value["category"],
+                MonthlyCategoryRollup.transaction_type == value["transaction_type"]
+            ).with_for_update().first()
+            if rollup:
+                rollup.total += value["total"]
+                rollup.count += value["count"]
+            else:
+                db.add(MonthlyCategoryRollup(**value))
+        db.flush()
+
+    # Groups whose last transaction went away
+    db.execute(delete(MonthlyCategoryRollup).where(
+        MonthlyCategoryRollup.user_id == user_id,
+        MonthlyCategoryRollup.count <= 0
+    ))
+
+
+def add_transaction_rows(db: Session, user_id: int, rows: Iterable[Dict]) -> None:
+    """Roll up freshly inserted transaction rows (dicts as built by ingestion)"""
+    deltas: Dict[RollupKey, List] = {}
+    for row in rows:
+        add_delta(deltas, row["date"], row["category"], row["transaction_type"], row["amount"])
+    apply_deltas(db, user_id, deltas)
+
+
+def remove_statement(db: Session, user_id: int, statement_id: int) -> None:
+    """Subtract a statement's transactions, call before deleting them"""
+    deltas = {
+        (month, category, transaction_type): [-(total or 0.0), -count]
+        for month, category, transaction_type, total, count in db.execute(
+            _grouped_transactions(db, Transaction.statement_id == statement_id)
+        )
+    }
+    apply_deltas(db, user_id, deltas)
+
+
+def _next_month(date: datetime) -> datetime:
+    if date.month == 12:
+        return datetime(date.year + 1, 1, 1)
+    return datetime(date.year, date.month + 1, 1)
+
+
+def _full_months(start_date: datetime, end_date: datetime) -> Optional[Tuple[datetime, datetime]]:
+    """[first, stop) covering the calendar months entirely inside [start_date, end_date]"""
+    first = datetime(start_date.year, start_date.month, 1)
+    if first < start_date.replace(tzinfo=None):
+        first = _next_month(first)
+    stop = first
+    while _next_month(stop) <= end_date.replace(tzinfo=None):
+        stop = _next_month(stop)
+    return (first, stop) if stop > first else None
+
+
+def summarize_range(
+    db: Session,
+    user_id: int,
+    start_date: datetime,
+    end_date: datetime,
+    include_end: bool = True,
+    transaction_type: Optional[str] = None,
+    category: Optional[str] = None
+) -> Dict[RollupKey, Tuple[float, int]]:
+    """Sum and count per (month, category, type) for transactions in a date window.
+
+    Whole calendar months are read from the rollup table, only the partial
+    months at the edges of the window touch the transactions table.
+    """
+    end_condition = Transaction.date <= end_date if include_end else Transaction.date < end_date
+    filters = [Transaction.user_id == user_id]
+    rollup_filters = [MonthlyCategoryRollup.user_id == user_id]
+    if transaction_type is not None:
+        filters.append(Transaction.transaction_type == transaction_type)
+        rollup_filters.append(MonthlyCategoryRollup.transaction_type == transaction_type)
+    if category is not None:
+        filters.append(func.coalesce(Transaction.category, "") == category)
+        rollup_filters.append(MonthlyCategoryRollup.category == category)
+
+    months = _full_months(start_date, end_date) if ROLLUPS_ENABLED else None
+    if months is None:
+        edges = [and_(Transaction.date >= start_date, end_condition)]
+    else:
+        first, stop = months
+        edges = [
+            and_(Transaction.date >= start_date, Transaction.date < first),
+            and_(Transaction.date >= stop, end_condition),
+        ]
+
+    summary: Dict[RollupKey, Tuple[float, int]] = {}
+    for edge in edges:
+        for month, row_category, row_type, total, count in db.execute(_grouped_transactions(db, edge, *filters)):
+            summary[(month, row_category, row_type)] = (float(total or 0.0), count)
+
+    if months is not None:
+        first, stop = months
+        rollups = db.execute(
+            select(
+                MonthlyCategoryRollup.month, MonthlyCategoryRollup.category,
+                MonthlyCategoryRollup.transaction_type, MonthlyCategoryRollup.total,
+                MonthlyCategoryRollup.count
+            ).where(
+                *rollup_filters,
+                MonthlyCategoryRollup.month >= first.strftime("%Y-%m"),
+                MonthlyCategoryRollup.month < stop.strftime("%Y-%m")
+            )
+        )
+        for month, row_category, row_type, total, count in rollups:
+            summary[(month, row_category, row_type)] = (float(total), count)
+    return summary
+
+
+def category_totals(
+    db: Session,
+    user_id: int,
+    start_date: datetime,
+    end_date: datetime,
+    transaction_type: str = "expense",
+    include_end: bool = True
+) -> Dict[str, float]:
+    """Total per category (categorized transactions only) of one transaction type"""
+    totals: Dict[str, float] = {}
+    summary = summarize_range(db, user_id, start_date, end_date, include_end, transaction_type=transaction_type)
+    for (_, category, _), (total, _) in summary.items():
+        if category:
+            totals[category] = totals.get(category, 0.0) + total
+    return totals
+
+
+def _expected_rollups(db: Session, user_id: Optional[int]):
+    conditions = [Transaction.user_id == user_id] if user_id is not None else []
+    month = month_key(db.get_bind().dialect.name)
+    category = func.coalesce(Transaction.category, "")
+    return select(
+        Transaction.user_id, month, category, Transaction.transaction_type,
+        func.sum(Transaction.amount), func.count(Transaction.id)
+    ).where(*conditions).group_by(Transaction.user_id, month, category, Transaction.transaction_type)
+
+
+def check_rollups(db: Session, user_id: Optional[int] = None) -> List[str]:
+    """Compare the rollup table with a fresh aggregation, return the differences"""
+    expected = {
+        (row_user, month, category, row_type): (float(total or 0.0), count)
+        for row_user, month, category, row_type, total, count in db.execute(_expected_rollups(db, user_id))
+    }
+    query = select(
+        MonthlyCategoryRollup.user_id, MonthlyCategoryRollup.month, MonthlyCategoryRollup.category,
+        MonthlyCategoryRollup.transaction_type, MonthlyCategoryRollup.total, MonthlyCategoryRollup.count
+    )
+    if user_id is not None:
+        query = query.where(MonthlyCategoryRollup.user_id == user_id)
+    actual = {
+        (row_user, month, category, row_type): (total, count)
+        for row_user, month, category, row_type, total, count in db.execute(query)
+    }
+
+    problems = []
+    for key in sorted(expected.keys() | actual.keys()):
+        want, have = expected.get(key, (0.0, 0)), actual.get(key, (0.0, 0))
+        if want[1] != have[1] or not math.isclose(want[0], have[0], rel_tol=1e-9, abs_tol=0.005):
+            problems.append(f"user {key[0]} {key[1]} {key[2] or '(uncategorized)'} {key[3]}: expected {want}, found {have}")
+    return problems
+
+
+def rebuild_rollups(db: Session, user_id: Optional[int] = None) -> None:
+    """Recompute rollups from the transactions table. Nothing is committed here."""
+    query = delete(MonthlyCategoryRollup)
+    if user_id is not None:
+        query = query.where(MonthlyCategoryRollup.user_id == user_id)
+    db.execute(query)
+    db.execute(insert(MonthlyCategoryRollup).from_select(
+        ["user_id", "month", "category", "transaction_type", "total", "count"],
+        _expected_rollups(db, user_id)
+    ))
+
+
+def backfill_rollups(db: Session) -> bool:
+    """Build the rollups once when the table is empty but transactions exist
+    (a database from before the table, or one created by `create_all`).
+    Commits and returns True if it rebuilt."""
+    if db.scalar(select(MonthlyCategoryRollup.id).limit(1)) is not None:
+        return False
+    if db.scalar(select(Transaction.id).limit(1)) is None:
+        return False
+    rebuild_rollups(db)
+    db.commit()
+    return True
+
+
+def main():
+    from app.database import SessionLocal
+
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("command", choices=["check", "rebuild"])
+    arg_parser.add_argument("--user-id", type=int)
+    args = arg_parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            rebuild_rollups(db, args.user_id)
+            db.commit()
+            print("Rollups rebuilt")
+        problems = check_rollups(db, args.user_id)
+    finally:
+        db.close()
+
+    for problem in problems:
+        print(problem)
+    print("Rollups consistent" if not problems else f"{len(problems)} rollup mismatches")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""AI categorization of a statement: one-request-per-row loop vs batched scheduler.
+
+Starts benchmarks.mock_openai in-process, then categorizes the same synthetic
+statement twice with use_ai=True:
+
+- legacy: the previous categorize_batch, one chat completion per transaction,
+  a 0.1 s sleep in between and at most 10 AI requests (the rest use keywords)
+- scheduler: AICategoryScheduler, batched JSON prompts, bounded concurrency,
+  token-bucket rate limit and 429 backoff
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_ai_categorizer --rows 300 --latency-ms 300 --rpm 30 --error-rate 0.1
+"""
+import argparse
+import os
+import socket
+import threading
+import time
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_mock_server(app, port: int):
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread
+
+
+def legacy_categorize_batch(categorizer, transactions):
+    """categorize_batch before the scheduler: first 10 rows one request each, then keywords"""
+    ai_count = 0
+    for transaction in transactions:
+        should_use_ai = ai_count < 10 and categorizer.openai_available
+        transaction["category"] = categorizer.categorize_transaction(
+            transaction.get("description", ""), transaction.get("amount", 0), use_ai=should_use_ai
+        )
+        if should_use_ai:
+            ai_count += 1
+            time.sleep(0.1)
+    return ai_count
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=300)
+    arg_parser.add_argument("--latency-ms", type=float, default=300.0, help="Mock server time per completion")
+    arg_parser.add_argument("--rpm", type=float, default=0.0, help="Mock server limit before 429 (0 = unlimited)")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0)
+    arg_parser.add_argument("--garbage-rate", type=float, default=0.0)
+    arg_parser.add_argument("--batch-size", type=int, default=25)
+    arg_parser.add_argument("--concurrency", type=int, default=4)
+    arg_parser.add_argument("--requests-per-minute", type=float, default=120.0)
+    args = arg_parser.parse_args()
+
+    from benchmarks.mock_openai import create_app
+
+    mock = create_app(args.latency_ms, args.rpm, args.error_rate, args.garbage_rate)
+    port = free_port()
+    server, thread = start_mock_server(mock, port)
+    os.environ["OPENAI_API_KEY"] = "mock"
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{port}/v1"
+    os.environ["OPENAI_MODEL"] = "mock"
+    os.environ["AI_BATCH_SIZE"] = str(args.batch_size)
+    os.environ["AI_MAX_CONCURRENCY"] = str(args.concurrency)
+    os.environ["AI_REQUESTS_PER_MINUTE"] = str(args.requests_per_minute)
+    # Scheduler settings are read when the app modules are first imported
+    from benchmarks.bench_categorizer import synthetic_descriptions
+    from app.services import ai_categorizer
+    from app.services.ai_categorizer import AICategorizer, CategoryMemo
+    from app.services.keyword_categorizer import get_keyword_categorizer
+
+    keywords = get_keyword_categorizer()
+    descriptions = synthetic_descriptions(args.rows)
+    expected = [keywords.categorize(d) for d in descriptions]
+
+    def statement():
+        return [{"description": d, "amount": 100.0} for d in descriptions]
+
+    try:
+        categorizer = AICategorizer(use_openai=True)
+        transactions = statement()
+        start = time.perf_counter()
+        ai_rows = legacy_categorize_batch(categorizer, transactions)
+        elapsed = time.perf_counter() - start
+        print(f"legacy     {elapsed:7.2f} s  AI rows {ai_rows:5d} / {len(transactions)}  "
+              f"mock {dict(mock.state.stats)}")
+
+        for key in mock.state.stats:
+            mock.state.stats[key] = 0
+        ai_categorizer._category_memo = CategoryMemo(ai_categorizer.CATEGORY_MEMO_SIZE)  # Cold memo
+        categorizer = AICategorizer(use_openai=True)
+        transactions = statement()
+        start = time.perf_counter()
+        categorizer.categorize_batch(transactions, use_ai=True)
+        elapsed = time.perf_counter() - start
+        stats = categorizer.last_ai_stats
+        merchants = stats["items"]
+        answered = merchants - stats["unanswered"]
+        print(f"scheduler  {elapsed:7.2f} s  AI merchants {answered:5d} / {merchants} "
+              f"({len(transactions)} rows)  {stats}")
+        print(f"           mock {dict(mock.state.stats)}")
+        assert [t["category"] for t in transactions] == expected, "categories differ from the keyword answers"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark: authenticated request throughput with and without the token cache.
+
+Sends --requests sequential authenticated requests to a few cheap endpoints
+through the FastAPI app, first with the token cache disabled (JWT decode and
+user lookup on every call, the original behaviour) and then enabled, and
+reports requests/s and database queries per request, plus calls/s of the
+auth dependency on its own. Also checks that updating and deleting the user
+invalidates the cache. Run from the backend directory:
+
+    python -m benchmarks.bench_auth --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+
+def run(client: TestClient, engine, headers, urls, requests: int):
+    queries = 0
+
+    def count(*args):
+        nonlocal queries
+        queries += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        start = time.perf_counter()
+        for i in range(requests):
+            client.get(urls[i % len(urls)], headers=headers).raise_for_status()
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    return requests / elapsed, queries / requests
+
+
+def run_dependency(token: str, requests: int) -> float:
+    """Calls/s of the auth dependency alone, without HTTP and routing overhead"""
+    from app.auth import get_current_principal
+    from app.database import AsyncSessionLocal, SessionLocal, SyncSessionAdapter
+
+    async def calls():
+        for _ in range(requests):
+            db = AsyncSessionLocal() if AsyncSessionLocal is not None else SyncSessionAdapter(SessionLocal())
+            try:
+                await get_current_principal(token=token, db=db)
+            finally:
+                await db.close()
+
+    start = time.perf_counter()
+    asyncio.run(calls())
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    arg_parser.add_argument("--requests", type=int, default=2000)
+    args = arg_parser.parse_args()
+
+    # app.database builds its engine from DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'auth.db')}"
+    os.environ.setdefault("INGESTION_BACKEND", "inprocess")
+    from app.auth import token_cache
+    from app.database import SessionLocal, async_engine, engine
+    from app.main import app
+    from app.models import User
+
+    email = f"auth-{time.time()}@example.com"
+    urls = ["/api/auth/me", "/api/goals/", "/api/fixed-expenses/"]
+    with TestClient(app) as client:
+        client.post("/api/auth/register", json={"email": email, "password": "bench-password", "full_name": "Bench"})
+        token = client.post("/api/auth/login", data={"username": email, "password": "bench-password"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        ttl = token_cache.ttl_seconds if token_cache.ttl_seconds > 0 else 60
+        token_cache.ttl_seconds = 0
+        # Requests run on the async engine unless DB_MODE=sync
+        request_engine = async_engine.sync_engine if async_engine is not None else engine
+        uncached = run(client, request_engine, headers, urls, args.requests)
+        uncached_dependency = run_dependency(token, args.requests)
+        token_cache.ttl_seconds = ttl
+        token_cache.clear()
+        cached = run(client, request_engine, headers, urls, args.requests)
+        cached_dependency = run_dependency(token, args.requests)
+
+        print(f"{args.requests} requests over {', '.join(urls)}")
+        print(f"  {'no token cache':<16} {uncached[0]:9.0f} req/s  {uncached[1]:5.2f} queries/request")
+        print(f"  {'token cache':<16} {cached[0]:9.0f} req/s  {cached[1]:5.2f} queries/request")
+        print(f"  {'speedup':<16} {cached[0] / uncached[0]:9.2f}x")
+        print("auth dependency alone")
+        print(f"  {'no token cache':<16} {uncached_dependency:9.0f} calls/s")
+        print(f"  {'token cache':<16} {cached_dependency:9.0f} calls/s")
+        print(f"  {'speedup':<16} {cached_dependency / uncached_dependency:9.2f}x")
+
+        # Invalidation: ORM changes to the user drop its cached tokens
+        db = SessionLocal()
+        user = db.query(User).filter(User.email == email).first()
+        user.full_name = "Renamed"
+        db.commit()
+        renamed = client.get("/api/auth/me", headers=headers).json()["full_name"] == "Renamed"
+        db.delete(user)
+        db.commit()
+        db.close()
+        rejected = client.get("/api/auth/me", headers=headers).status_code == 401
+        print(f"  invalidation on update: {'ok' if renamed else 'FAILED'}, on delete: {'ok' if rejected else 'FAILED'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Text vs layout extraction mode: speed and accuracy against ground truth.
+
+Parses fixture statements with PDFParser(mode="text") and PDFParser(mode="layout")
+and compares the transactions with the expected ones: exact matches on (date,
+description, amount, type), and how many types and amounts are right. Times are
+split into pdfplumber extraction and line scanning (classifier plus regexes).
+First, layout pages are checked to survive pickling (how extract workers hand
+them back) and layout parsing with two extract workers must match the serial
+result; the run exits with status 1 otherwise.
+Fixtures are PDFs with a JSON ground truth file next to them (see
+benchmarks/pdf_generator.py); without paths, a set is generated in a temporary
+directory. Run from the backend directory:
+
+    python -m benchmarks.bench_layout_mode --statements 5 --rows 300
+    python -m benchmarks.bench_layout_mode fixtures/*.pdf
+"""
+import argparse
+import json
+import os
+import pickle
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+from app.services.pdf_parser import LayoutPage, PDFParser
+from benchmarks.pdf_generator import generate_statement
+
+
+def load_fixtures(paths: List[str]) -> List[Tuple[str, bytes, List[Dict]]]:
+    fixtures = []
+    for path in paths:
+        with open(path, "rb") as f:
+            pdf_content = f.read()
+        with open(os.path.splitext(path)[0] + ".json") as f:
+            fixtures.append((path, pdf_content, json.load(f)))
+    return fixtures
+
+
+def score(transactions: List[Dict], expected: List[Dict]) -> Dict[str, int]:
+    """Exact matches (as a multiset) plus type and amount agreement of rows in the same position"""
+    def key(row):
+        row_date = row["date"] if isinstance(row["date"], str) else row["date"].date().isoformat()
+        return row_date, row["description"], round(row["amount"], 2), row["transaction_type"]
+
+    got = Counter(key(row) for row in transactions)
+    want = Counter(key(row) for row in expected)
+    pairs = list(zip(transactions, expected))
+    return {
+        "parsed": len(transactions),
+        "expected": len(expected),
+        "exact": sum((got & want).values()),
+        "type_ok": sum(row["transaction_type"] == truth["transaction_type"] for row, truth in pairs),
+        "amount_ok": sum(round(row["amount"], 2) == round(truth["amount"], 2) for row, truth in pairs),
+    }
+
+
+def run_mode(mode: str, fixtures, repeat: int) -> Dict:
+    totals = Counter()
+    best = {"total": 0.0, "extract": 0.0, "scan": 0.0}
+    for _, pdf_content, expected in fixtures:
+        parser = PDFParser(mode=mode)
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            transactions = parser.parse_statement(pdf_content)
+            stats = parser.last_stats
+            runs.append((time.perf_counter() - start, stats["extract_seconds"],
+                         stats["filter_seconds"] + stats["regex_seconds"]))
+        total, extract, scan = min(runs)
+        best["total"] += total
+        best["extract"] += extract
+        best["scan"] += scan
+        totals.update(score(transactions, expected))
+    return {**best, **totals}
+
+
+def check_pickling(pdf_content: bytes) -> List[str]:
+    """Layout pages must come back from a process pool unchanged, returns the problems found"""
+    problems = []
+    for page_number, page in PDFParser(workers=1).iter_pages(pdf_content, layout=True):
+        restored = pickle.loads(pickle.dumps(page))
+        if not isinstance(restored, LayoutPage) or str(restored) != str(page):
+            problems.append(f"page {page_number}: text changed by a pickle round trip")
+        elif [(str(line), line.words) for line in restored.lines] != [(str(line), line.words) for line in page.lines]:
+            problems.append(f"page {page_number}: lines or word positions changed by a pickle round trip")
+
+    serial = PDFParser(workers=1, mode="layout").parse_statement(pdf_content)
+    parallel_parser = PDFParser(workers=2, pages_per_task=1, mode="layout")
+    parallel = parallel_parser.parse_statement(pdf_content)
+    if parallel != serial:
+        problems.append(f"two extract workers parsed {len(parallel)} transactions as "
+                        f"{parallel_parser.last_stats['format']}, serial extraction differs")
+    return problems
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("pdfs", nargs="*", help="fixture PDFs, each with a .json ground truth file")
+    arg_parser.add_argument("--statements", type=int, default=5)
+    arg_parser.add_argument("--rows", type=int, default=300)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    if args.pdfs:
+        fixtures = load_fixtures(args.pdfs)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for i in range(args.statements):
+                pdf_content, expected = generate_statement(args.rows, seed=i)
+                path = os.path.join(directory, f"statement_{i:03d}.pdf")
+                with open(path, "wb") as f:
+                    f.write(pdf_content)
+                with open(path[:-4] + ".json", "w") as f:
+                    json.dump(expected, f)
+                paths.append(path)
+            fixtures = load_fixtures(paths)
+
+    problems = check_pickling(fixtures[0][1])
+    for problem in problems:
+        print(f"layout pickling: {problem}")
+    if problems:
+        sys.exit(1)
+    print("layout pages survive pickling, parallel extraction matches serial")
+
+    print(f"{len(fixtures)} statements, {sum(len(expected) for _, _, expected in fixtures)} movements")
+    print(f"{'mode':<8} {'total ms':>9} {'extract':>9} {'scan':>9} {'parsed':>7} {'exact':>7} {'type ok':>8} {'amount ok':>10}")
+    for mode in ("text", "layout"):
+        result = run_mode(mode, fixtures, args.repeat)
+        expected = result["expected"]
+        print(f"{mode:<8} {result['total'] * 1000:>9.1f} {result['extract'] * 1000:>9.1f} {result['scan'] * 1000:>9.1f} "
+              f"{result['parsed']:>7} {result['exact'] / expected:>7.1%} {result['type_ok'] / expected:>8.1%} "
+              f"{result['amount_ok'] / expected:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Micro-benchmark: precompiled LineClassifier vs the original per-call regex filters.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_line_classifier --lines 10000
+"""
+import argparse
+import random
+import re
+import time
+from typing import List
+from app.services.line_classifier import get_line_classifier
+
+
+class LegacyLineFilters:
+    """The filters as PDFParser implemented them before LineClassifier (kept for comparison)"""
+
+    def is_header_footer(self, line: str) -> bool:
+        """Check if line is header/footer content that should be skipped"""
+        line_lower = line.lower()
+        
+        # Skip header patterns
+        skip_patterns = [
+            r'^periodo\s+del', r'^fecha de corte', r'^no\.?\s*de cuenta', r'^no\.?\s*de cliente',
+            r'^r\.?f\.?c\.?', r'^clabe', r'^sucursal', r'^direccion', r'^telefono',
+            r'^saldo', r'^depositos', r'^retiros', r'^total', r'^página', r'^pagina',
+            r'^concepto', r'^cantidad', r'^columna', r'^av\.?\s+paseo', r'^ciudad de',
+            r'^código postal', r'^régimen fiscal', r'^uso de cfdi', r'^exportación',
+            r'^no\.?\s*de serie', r'^fecha y hora', r'^estimado cliente',
+            r'^disposición oficial', r'^certificado', r'^vencimiento',
+            r'^tiene\s+\d+', r'^aclaración', r'^llamando al', r'^electrónico',
+            r'^www\.', r'^persona que', r'^número de cuenta',
+            r'^depósitos\s*/\s*abonos', r'^otros\s+cargos', r'^abonos\s*\(', r'^cargos\s*\(',
+            r'^total\s+importe', r'^total\s+movimientos', r'^nota\s*:', r'^la\s+gat',
+            r'^bbva\s+mexico', r'^institucion\s+de\s+banca', r'^grupo\s+financiero',
+            r'^\d{10,}',  # Very long numbers (account numbers, etc.)
+            r'^\(cid:',  # PDF encoding artifacts
+            r'^[a-z0-9+/=]{50,}',  # Base64-like strings (certificates, etc.)
+            r'^[a-z0-9+/=]{30,}\|',  # Base64 with pipe (certificates)
+            r'granada.*código\s+postal',  # Address patterns
+            r'col\.\s+juárez', r'alcaldía', r'paseo\s+de\s+la\s+reforma',
+        ]
+        
+        for pattern in skip_patterns:
+            if re.search(pattern, line_lower):
+                return True
+        
+        # Skip lines that are mostly numbers or very short
+        if len(line.strip()) < 5:
+            return True
+        
+        # Skip lines that look like addresses
+        if re.search(r'cp\s*\d+|col\.|colonia|calle|avenida|av\.', line_lower):
+            return True
+        
+        # Skip summary lines (contain totals, percentages, etc.)
+        if re.search(r'total|porcentaje|señala|columna|rendimiento|gat', line_lower):
+            if not any(merchant in line_lower for merchant in ['rest', 'uber', 'spei', 'starbucks']):
+                return True
+        
+        return False
+    
+    def is_valid_transaction(self, description: str, amount: float) -> bool:
+        """Validate if this looks like a real transaction"""
+        # Amount must be reasonable (between 1 and 10,000,000 MXN)
+        if amount < 1 or amount > 10000000:
+            return False
+        
+        # Description must have some text (not just numbers)
+        if len(description) < 5:
+            return False
+        
+        # Skip if description is mostly numbers
+        num_chars = sum(c.isdigit() for c in description)
+        if num_chars > len(description) * 0.7:
+            return False
+        
+        # Skip common non-transaction patterns
+        desc_lower = description.lower()
+        invalid_patterns = [
+            r'^\d+$',  # Just numbers
+            r'^no\.?\s*de',  # "No. de Cuenta", etc.
+            r'^r\.?f\.?c\.?',  # RFC
+            r'^clabe',  # CLABE
+            r'^página',  # Page numbers
+            r'^pagina',
+            r'^av\.?\s+paseo',  # Addresses
+            r'^ciudad de',
+            r'^código postal',
+            r'^\(cid:',  # PDF artifacts
+            r'^[a-z0-9+/=]{30,}$',  # Base64-like
+            r'^[a-z0-9+/=]{20,}\|',  # Base64 with pipe
+            r'depósitos\s*/\s*abonos',  # Summary lines
+            r'otros\s+cargos',  # Summary lines
+            r'total\s+importe',  # Summary lines
+            r'total\s+movimientos',  # Summary lines
+            r'nota\s*:',  # Notes
+            r'la\s+gat\s+real',  # Footer text
+            r'bbva\s+mexico',  # Footer text
+            r'institucion\s+de\s+banca',  # Footer text
+            r'grupo\s+financiero',  # Footer text
+            r'señala\s+con',  # Note text
+            r'columna.*porcentaje',  # Note text
+            r'granada.*código\s+postal',  # Address
+            r'col\.\s+juárez',  # Address
+            r'alcaldía',  # Address
+            r'estimado\s+cliente',  # Footer text
+            r'disposición\s+oficial',  # Footer text
+        ]
+        
+        for pattern in invalid_patterns:
+            if re.search(pattern, desc_lower):
+                return False
+        
+        return True
+    
+    def is_reference_line(self, line: str) -> bool:
+        """Check if line is a reference/code line that should be skipped"""
+        line = line.strip()
+        line_lower = line.lower()
+        
+        # Skip reference lines
+        if line_lower.startswith('referencia'):
+            return True
+        
+        # Skip long alphanumeric codes (like MBAN01002510030092914825, 00638180010133810588)
+        if re.match(r'^[A-Z0-9]{15,}$', line):
+            return True
+        
+        # Skip lines that are just numbers with letters (like 0109250dhl)
+        if re.match(r'^\d+[a-z]+$', line_lower) and len(line) < 20:
+            return True
+        
+        # Skip lines that look like names (all caps, multiple words)
+        if re.match(r'^[A-ZÁÉÍÓÚÑ\s]{10,}$', line) and not any(char.isdigit() for char in line):
+            return True
+        
+        return False
+    
+    def is_skipped(self, line: str) -> bool:
+        if self.is_header_footer(line):
+            return True
+        if self.is_reference_line(line):
+            return True
+        return bool(re.match(r'^(RFC|AUT|Referencia):', line, re.IGNORECASE))
+
+
+MERCHANTS = [
+    "OXXO ROMA NORTE", "UBER EATS", "UBER TRIP", "SPEI ENVIADO NU MEXICO", "SPEI RECIBIDO BANORTE",
+    "STARBUCKS REFORMA", "CINEPOLIS PLAZA", "NETFLIX MX", "GASOLINERA PEMEX", "LIVERPOOL SANTA FE",
+    "REST LA CASA DE TOÑO", "FARMACIA GUADALAJARA", "SORIANA HIPER", "TELCEL PAGO",
+]
+
+NOISE_LINES = [
+    "Periodo DEL 01/10/2025 AL 31/10/2025", "No. de Cuenta 0123456789", "Saldo Anterior 12,345.67",
+    "Total de Movimientos", "Página 2 de 5", "Av. Paseo de la Reforma 510", "Col. Juárez CP 06600",
+    "Referencia 0012345678", "MBAN01002510030092914825", "0109250dhl", "JUAN PEREZ LOPEZ",
+    "RFC: BBA830831LJ2", "AUT: 123456", "Estimado Cliente, su estado de cuenta ha sido modificado",
+    "La GAT Real es el rendimiento que obtendría", "BBVA MEXICO, S.A., INSTITUCION DE BANCA MULTIPLE",
+    "QUJDREVGR0hJSktMTU5PUFFSU1RVVldYWVo0MTIzNDU2Nzg5MGFiY2RlZmdoaWprbG1u",
+]
+
+DESCRIPTIONS = MERCHANTS + ["0123456789", "No. de Cuenta", "Total Importe Cargos", "BBVA Mexico SA", "ABC"]
+
+
+def synthetic_statement(lines: int, seed: int = 42) -> List[str]:
+    """Deterministic BBVA-like statement lines, roughly 60% transactions and 40% noise"""
+    rng = random.Random(seed)
+    result = []
+    for _ in range(lines):
+        if rng.random() < 0.6:
+            day = f"{rng.randint(1, 28):02d}/OCT"
+            amount = f"{rng.randint(1, 9999):,}.{rng.randint(0, 99):02d}"
+            result.append(f"{day} {day} {rng.choice(MERCHANTS)} {amount} 1,234.56 1,234.56")
+        else:
+            result.append(rng.choice(NOISE_LINES))
+    return result
+
+
+def bench(label: str, func, items, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<40} {best * 1000:9.2f} ms  ({best / len(items) * 1e6:6.2f} us/item)")
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--lines", type=int, default=10000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    lines = synthetic_statement(args.lines)
+    descriptions = [(d, 100.0) for d in DESCRIPTIONS] * max(1, args.lines // len(DESCRIPTIONS))
+    legacy = LegacyLineFilters()
+    classifier = get_line_classifier()
+
+    # Both implementations must agree before timing means anything
+    for line in lines:
+        assert legacy.is_skipped(line) == (classifier.classify(line) is not None), line
+    for description, amount in descriptions:
+        assert legacy.is_valid_transaction(description, amount) == (
+            classifier.invalid_description_rule(description, amount) is None
+        ), description
+
+    print(f"{len(lines)} statement lines, {len(descriptions)} descriptions")
+    old = bench("legacy line filters", legacy.is_skipped, lines, args.repeat)
+    new = bench("LineClassifier.classify", classifier.classify, lines, args.repeat)
+    print(f"{'speedup':<40} {old / new:9.2f}x")
+    old = bench("legacy is_valid_transaction", lambda d: legacy.is_valid_transaction(*d), descriptions, args.repeat)
+    new = bench("LineClassifier.invalid_description_rule", lambda d: classifier.invalid_description_rule(*d), descriptions, args.repeat)
+    print(f"{'speedup':<40} {old / new:9.2f}x")
+
+    skipped = {}
+    for line in lines:
+        rule = classifier.classify(line)
+        if rule:
+            skipped[rule] = skipped.get(rule, 0) + 1
+    print("lines skipped by rule:", dict(sorted(skipped.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark: a login burst with bcrypt on the event loop vs in the password hash pool.
+
+Fires --logins concurrent logins at the app (httpx ASGITransport, one event
+loop) while a probe keeps calling /api/health every 5 ms, and reports the
+login status codes and the gaps between completed probes (a blocked event
+loop shows up as one long gap). "inline" reproduces the original behaviour
+(bcrypt called directly from the async handler), "pool" is the bounded
+PasswordHasher, which answers 429 with Retry-After once its queue is full.
+Run from the backend directory:
+
+    python -m benchmarks.bench_login_burst --logins 40
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from collections import Counter
+
+import httpx
+
+
+class InlineHasher:
+    """Original behaviour: bcrypt runs on the event loop thread"""
+
+    async def hash(self, password):
+        from app.auth import get_password_hash
+        return get_password_hash(password)
+
+    async def verify_and_update(self, password, hashed_password):
+        from app.auth import pwd_context
+        return pwd_context.verify_and_update(password, hashed_password)
+
+
+async def burst(app, email: str, logins: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        probe_gaps = []
+        done = asyncio.Event()
+
+        async def probe():
+            last = time.perf_counter()
+            while not done.is_set():
+                await client.get("/api/health")
+                now = time.perf_counter()
+                probe_gaps.append(now - last)
+                last = now
+                await asyncio.sleep(0.005)
+
+        async def login():
+            response = await client.post("/api/auth/login", data={"username": email, "password": "bench-password"})
+            return response.status_code
+
+        probe_task = asyncio.create_task(probe())
+        start = time.perf_counter()
+        statuses = await asyncio.gather(*[login() for _ in range(logins)])
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe_task
+    await _dispose_async_pool()
+    return elapsed, Counter(statuses), probe_gaps
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    arg_parser.add_argument("--logins", type=int, default=40)
+    args = arg_parser.parse_args()
+
+    # app.database builds its engine from DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'login_burst.db')}"
+    os.environ.setdefault("INGESTION_BACKEND", "inprocess")
+    import app.auth as auth
+    from app.main import app
+
+    email = f"burst-{time.time()}@example.com"
+    asyncio.run(_register(app, email))
+
+    pool_hasher = auth.password_hasher
+    print(f"{args.logins} concurrent logins, bcrypt rounds {auth.BCRYPT_ROUNDS}, "
+          f"pool of {pool_hasher.workers} workers / {pool_hasher.max_pending} pending")
+    for label, hasher in (("inline", InlineHasher()), ("pool", pool_hasher)):
+        auth.password_hasher = hasher
+        elapsed, statuses, gaps = asyncio.run(burst(app, email, args.logins))
+        gaps.sort()
+        p95 = gaps[int(len(gaps) * 0.95) - 1] if len(gaps) >= 20 else gaps[-1]
+        print(f"  {label:<7} burst {elapsed:6.2f} s  statuses {dict(statuses)}")
+        print(f"  {'':<7} health probes {len(gaps):4d}, gap median {statistics.median(gaps) * 1000:7.1f} ms, "
+              f"p95 {p95 * 1000:7.1f} ms, max {gaps[-1] * 1000:7.1f} ms")
+    auth.password_hasher = pool_hasher
+
+
+async def _register(app, email: str) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/api/auth/register", json={"email": email, "password": "bench-password"})
+        response.raise_for_status()
+    await _dispose_async_pool()
+
+
+async def _dispose_async_pool() -> None:
+    # Each asyncio.run() gets a new event loop, pooled async connections cannot follow it
+    from app.database import async_engine
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
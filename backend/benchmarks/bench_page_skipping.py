@@ -0,0 +1,42 @@
+"""Measure what early-exit page scanning saves on real statements.
+
+For every PDF it compares extracting every page (`extract_text`) with the lazy
+pipeline used by `extract_transactions`, and prints the page skip counts.
+Run from the backend directory:
+
+    python -m benchmarks.bench_page_skipping statements/*.pdf
+"""
+import argparse
+import time
+from app.services.pdf_parser import PDFParser
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("pdfs", nargs="+", help="statement PDFs to measure")
+    args = arg_parser.parse_args()
+
+    print(f"{'file':<40} {'pages':>5} {'read':>5} {'lead':>5} {'trail':>5} {'full ms':>9} {'lazy ms':>9} {'txns':>5}")
+    for path in args.pdfs:
+        with open(path, "rb") as f:
+            pdf_content = f.read()
+        parser = PDFParser()
+
+        start = time.perf_counter()
+        parser.extract_text(pdf_content)
+        full = time.perf_counter() - start
+
+        start = time.perf_counter()
+        transactions = parser.extract_transactions(pdf_content)
+        lazy = time.perf_counter() - start
+
+        stats = parser.last_stats
+        print(
+            f"{path[-40:]:<40} {stats['pages_total']:>5} {stats['pages_extracted']:>5} "
+            f"{stats['pages_skipped_leading']:>5} {stats['pages_skipped_trailing']:>5} "
+            f"{full * 1000:>9.1f} {lazy * 1000:>9.1f} {len(transactions):>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
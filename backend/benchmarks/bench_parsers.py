@@ -0,0 +1,131 @@
+"""Per-plugin benchmark for the bank statement formats in app/services/parsers.
+
+For every registered format it checks which plugin the first page of each
+synthetic sample statement is sniffed as, then times `sniff` and `parse` on the
+sample written in that format's layout. Formats without a sample are listed and
+skipped. Given real PDFs, it also compares picking the format from page 1 with
+trial-parsing the whole document with every plugin. Run from the backend directory:
+
+    python -m benchmarks.bench_parsers --rows 5000 [statements/*.pdf]
+"""
+import argparse
+import random
+import time
+from typing import Callable, Dict, List
+from app.services.parsers import STATEMENT_FORMATS, sniff_format
+from benchmarks.bench_line_classifier import MERCHANTS, NOISE_LINES
+
+# Noise that does not end BBVA's movements section early
+SECTION_NOISE = [line for line in NOISE_LINES if "total" not in line.lower()]
+
+
+def bbva_pages(rows: int, seed: int = 42) -> List[str]:
+    """Summary page, then movements with DD/MMM dates between the BBVA section markers"""
+    rng = random.Random(seed)
+    summary = "\n".join([
+        "BBVA MEXICO, S.A., INSTITUCION DE BANCA MULTIPLE", "Periodo DEL 01/10/2025 AL 31/10/2025",
+        "No. de Cuenta 0123456789", "Saldo Anterior 12,345.67",
+    ])
+    lines = ["Detalle de Movimientos Realizados", "FECHA OPER LIQ DESCRIPCION REFERENCIA CARGOS ABONOS"]
+    for _ in range(rows):
+        day = f"{rng.randint(1, 28):02d}/OCT"
+        amount = f"{rng.randint(1, 9999):,}.{rng.randint(0, 99):02d}"
+        lines.append(f"{day} {day} {rng.choice(MERCHANTS)} {amount} 1,234.56 1,234.56")
+        if rng.random() < 0.4:
+            lines.append(rng.choice(SECTION_NOISE))
+    lines.append("Total de Movimientos")
+    return [summary, "\n".join(lines)]
+
+
+def generic_pages(rows: int, seed: int = 42) -> List[str]:
+    """A bank without a plugin: DD/MM/YYYY dates, signed amounts, no section markers"""
+    rng = random.Random(seed)
+    lines = ["BANCO EJEMPLO", "Estado de cuenta", "Periodo DEL 01/10/2025 AL 31/10/2025"]
+    for _ in range(rows):
+        date = f"{rng.randint(1, 28):02d}/10/2025"
+        sign = "-" if rng.random() < 0.8 else ""
+        lines.append(f"{date} {rng.choice(MERCHANTS)} {sign}{rng.randint(1, 9999):,}.{rng.randint(0, 99):02d} 8,765.43")
+        if rng.random() < 0.4:
+            lines.append(rng.choice(SECTION_NOISE))
+    return ["\n".join(lines[:40]), "\n".join(lines[40:])]
+
+
+SAMPLES: Dict[str, Callable[[int], List[str]]] = {
+    "bbva": bbva_pages,
+    "generic": generic_pages,
+}
+
+
+def best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_samples(rows: int, repeat: int) -> None:
+    pages = {name: make_pages(rows) for name, make_pages in SAMPLES.items()}
+    print("sniffed as")
+    for sample, sample_pages in pages.items():
+        chosen = sniff_format(sample_pages[0]).name
+        print(f"  {sample:<10} -> {chosen:<10} {'ok' if chosen == sample else 'MISMATCH'}")
+
+    print(f"\n{'format':<10} {'sniff us':>9} {'lines':>7} {'parse ms':>9} {'klines/s':>9} {'txns':>6}")
+    for name, statement_format in STATEMENT_FORMATS.items():
+        if name not in pages:
+            print(f"{name:<10} (no sample statement, skipped)")
+            continue
+        first_page = pages[name][0]
+        lines = "\n".join(pages[name]).split("\n")
+        sniff = best_of(lambda: [statement_format.sniff(first_page) for _ in range(1000)], repeat) / 1000
+        parse = best_of(lambda: statement_format.parse(lines), repeat)
+        transactions = statement_format.parse(lines)
+        print(f"{name:<10} {sniff * 1e6:>9.2f} {len(lines):>7} {parse * 1000:>9.2f} "
+              f"{len(lines) / parse / 1000:>9.1f} {len(transactions):>6}")
+
+
+def bench_pdfs(paths: List[str]) -> None:
+    from app.services.pdf_parser import PDFParser
+
+    print(f"\n{'file':<40} {'format':<10} {'sniff ms':>9} {'trial ms':>9} {'parse ms':>9} {'txns':>5}")
+    for path in paths:
+        with open(path, "rb") as f:
+            pdf_content = f.read()
+        parser = PDFParser()
+
+        # Format from page 1: one page extraction
+        start = time.perf_counter()
+        for _, text in parser.iter_pages(pdf_content):
+            chosen = sniff_format(text)
+            break
+        sniff = time.perf_counter() - start
+
+        # Alternative: extract everything and keep the plugin that finds the most transactions
+        start = time.perf_counter()
+        lines = parser.extract_text(pdf_content).split("\n")
+        max(STATEMENT_FORMATS.values(), key=lambda statement_format: len(statement_format.parse(lines)))
+        trial = time.perf_counter() - start
+
+        start = time.perf_counter()
+        transactions = parser.extract_transactions(pdf_content)
+        parse = time.perf_counter() - start
+        print(f"{path[-40:]:<40} {chosen.name:<10} {sniff * 1000:>9.1f} {trial * 1000:>9.1f} "
+              f"{parse * 1000:>9.1f} {len(transactions):>5}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("pdfs", nargs="*", help="statement PDFs to measure")
+    arg_parser.add_argument("--rows", type=int, default=5000, help="Transactions per sample statement")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    bench_samples(args.rows, args.repeat)
+    if args.pdfs:
+        bench_pdfs(args.pdfs)
+
+
+if __name__ == "__main__":
+    main()
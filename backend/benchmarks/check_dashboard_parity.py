@@ -0,0 +1,191 @@
+"""Parity check: SQL and rollup dashboard aggregation vs the original in-Python implementation.
+
+Seeds a database with random transactions (including income, uncategorized and
+empty-category rows, and types other than income/expense) through the
+incremental rollup maintenance, deletes one statement per user, moves some
+transactions across month boundaries with timezone-aware dates (as
+PUT /api/transactions/{id} does), checks the rollup table against a fresh
+aggregation, then compares
+`summarize_transactions_sql` and `summarize_transactions_rollup` against
+`summarize_transactions_python` for every dashboard window. Exits non-zero on
+any mismatch and prints the timings.
+Run from the backend directory:
+
+    python -m benchmarks.check_dashboard_parity --rows 20000
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine, delete, insert, select
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import User, Statement, Transaction
+from app.services.dashboard import (
+    summarize_transactions_python, summarize_transactions_rollup, summarize_transactions_sql
+)
+from app.services.rollups import (
+    add_delta, add_transaction_rows, apply_deltas, check_rollups, remove_statement, utc_naive
+)
+
+CATEGORIES = ["Food", "Transportation", "Payments/Recurring expenses", "Personal shopping", "Entertainment", None, ""]
+TYPES = ["expense"] * 6 + ["income"] * 3 + ["transfer"]
+
+
+def seed(db, users: int, rows: int, seed_value: int = 11):
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    user_ids = []
+    for i in range(users):
+        user = User(email=f"parity-{i}@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        for _ in range(2):
+            statement = Statement(user_id=user.id, filename="parity.pdf", processed=True)
+            db.add(statement)
+            db.flush()
+            user_ids.append((user.id, statement.id))
+    batch = []
+    for _ in range(rows):
+        user_id, statement_id = rng.choice(user_ids)
+        batch.append({
+            "statement_id": statement_id,
+            "user_id": user_id,
+            "date": now - timedelta(days=rng.uniform(0, 400)),
+            "description": f"MERCHANT {rng.randint(1, 300)} PURCHASE",
+            # Repeated amounts exercise the tie order of the top-10 list
+            "amount": rng.choice([round(rng.uniform(1, 20000), 2), 500.0, 1500.0]),
+            "transaction_type": rng.choice(TYPES),
+            "category": rng.choice(CATEGORIES),
+            "original_text": "",
+        })
+    db.execute(insert(Transaction), batch)
+    for user_id, statement_id in user_ids:
+        add_transaction_rows(db, user_id, [row for row in batch if row["statement_id"] == statement_id])
+    db.commit()
+
+    # Delete the second statement of every user, like the statements router does
+    for user_id, statement_id in user_ids[1::2]:
+        remove_statement(db, user_id, statement_id)
+        db.execute(delete(Transaction).where(Transaction.statement_id == statement_id))
+    db.commit()
+
+    edit_dates(db, rng)
+    return sorted({user_id for user_id, _ in user_ids})
+
+
+def edit_dates(db, rng: random.Random, edits: int = 20):
+    """Give transactions aware dates whose UTC month differs from the local one, like the
+    transactions router's update"""
+    offsets = [timezone(timedelta(hours=-6)), timezone(timedelta(hours=-2)), timezone(timedelta(hours=5, minutes=30))]
+    transactions = db.scalars(select(Transaction).order_by(Transaction.id).limit(edits * 10)).all()
+    for transaction in rng.sample(transactions, min(edits, len(transactions))):
+        tz = rng.choice(offsets)
+        month_start = datetime(transaction.date.year, transaction.date.month, 1, tzinfo=tz)
+        # Late on the last day of the previous month (west of UTC) or early on the 1st (east)
+        if tz.utcoffset(None) < timedelta(0):
+            new_date = month_start - timedelta(hours=1)
+        else:
+            new_date = month_start + timedelta(hours=1)
+        deltas = {}
+        add_delta(deltas, transaction.date, transaction.category, transaction.transaction_type, transaction.amount, -1)
+        transaction.date = utc_naive(new_date)
+        add_delta(deltas, transaction.date, transaction.category, transaction.transaction_type, transaction.amount)
+        apply_deltas(db, transaction.user_id, deltas)
+    db.commit()
+
+
+def close(a, b) -> bool:
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+
+
+def compare(expected, actual):
+    """Return a list of differences between two dashboard summaries"""
+    problems = []
+    for key in ("total_income", "total_expenses", "net_balance"):
+        if not close(expected[key], actual[key]):
+            problems.append(f"{key}: {expected[key]} != {actual[key]}")
+
+    # The Python version lists categories in row order, which SQL does not define
+    expected_categories = {c.category: c for c in expected["category_summary"]}
+    actual_categories = {c.category: c for c in actual["category_summary"]}
+    if expected_categories.keys() != actual_categories.keys():
+        problems.append(f"categories: {sorted(expected_categories)} != {sorted(actual_categories)}")
+    else:
+        for name, summary in expected_categories.items():
+            other = actual_categories[name]
+            if summary.count != other.count or not close(summary.total, other.total):
+                problems.append(f"category {name}: {summary} != {other}")
+
+    if [m["month"] for m in expected["monthly_trend"]] != [m["month"] for m in actual["monthly_trend"]]:
+        problems.append("monthly_trend months differ")
+    else:
+        for e, a in zip(expected["monthly_trend"], actual["monthly_trend"]):
+            if not all(close(e[k], a[k]) for k in ("income", "expenses", "net")):
+                problems.append(f"month {e['month']}: {e} != {a}")
+
+    # The Python version keeps ties in row order, which depends on the query plan
+    # (e.g. whether a user/date index is used), so equal amounts compare unordered
+    # and only amounts are compared in the tie cut off by the top 10 limit
+    expected_top = [(t.description, t.amount, t.date, t.category) for t in expected["top_expenses"]]
+    actual_top = [(t.description, t.amount, t.date, t.category) for t in actual["top_expenses"]]
+    cutoff = expected_top[-1][1] if len(expected_top) == 10 else None
+    if (
+        [row[1] for row in expected_top] != [row[1] for row in actual_top]
+        or sorted(row for row in expected_top if row[1] != cutoff) != sorted(row for row in actual_top if row[1] != cutoff)
+    ):
+        problems.append(f"top_expenses: {expected_top} != {actual_top}")
+    return problems
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    arg_parser.add_argument("--users", type=int, default=3)
+    arg_parser.add_argument("--rows", type=int, default=20000)
+    args = arg_parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'parity.db')}"
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user_ids = seed(db, args.users, args.rows)
+
+    failures = 0
+    for problem in check_rollups(db):
+        failures += 1
+        print(f"rollups: {problem}")
+
+    python_time = sql_time = rollup_time = 0.0
+    end_date = datetime.utcnow()
+    for user_id in user_ids:
+        for months in range(1, 13):
+            start_date = end_date - timedelta(days=months * 30)
+            start = time.perf_counter()
+            expected = summarize_transactions_python(db, user_id, start_date, end_date)
+            python_time += time.perf_counter() - start
+            start = time.perf_counter()
+            actual = summarize_transactions_sql(db, user_id, start_date, end_date)
+            sql_time += time.perf_counter() - start
+            start = time.perf_counter()
+            from_rollups = summarize_transactions_rollup(db, user_id, start_date, end_date)
+            rollup_time += time.perf_counter() - start
+            for label, summary in (("sql", actual), ("rollup", from_rollups)):
+                for problem in compare(expected, summary):
+                    failures += 1
+                    print(f"{label}, user {user_id}, months={months}: {problem}")
+            db.expunge_all()
+
+    print(f"python aggregation: {python_time * 1000:9.1f} ms")
+    print(f"sql aggregation:    {sql_time * 1000:9.1f} ms")
+    print(f"rollup aggregation: {rollup_time * 1000:9.1f} ms")
+    print("parity OK" if not failures else f"{failures} mismatches")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""Load test: mixed API traffic against users seeded by benchmarks/seed_load.py.
+
+For each tier of seeded users (transactions per user, --rows-per-user), logs
+every user in, then sends requests for --duration seconds at --rate requests/s
+with Poisson arrivals, each to a random route from --mix and a random user of
+the tier:
+
+- login: POST /api/auth/login
+- dashboard: GET /api/transactions/dashboard?months=--months
+- recommendations: GET /api/recommendations/
+- transactions: GET /api/transactions/?limit=50
+- upload: POST /api/statements/upload with a small generated statement (queued)
+
+Arrivals do not wait for earlier responses, so a slow server builds a backlog
+instead of slowing the client down. Latency is measured from each request's
+scheduled time, so time spent queued behind that backlog counts too. Any status
+of 400 or above, or a timeout, is an error. For every route the report shows
+p50/p95/p99/max latency and the error rate. A summary then shows, per tier, the
+p95 of dashboard and recommendations. It names the first tier where either
+misses --slo-ms or fails more than 1% of requests.
+
+Without --base-url the app runs in this process (httpx ASGITransport) against
+--database-url; with it, requests go to a running server (e.g. uvicorn with the
+same DATABASE_URL). Run from the backend directory after seeding:
+
+    python -m benchmarks.load_test --database-url sqlite:///load_test.db --users 10 --rows-per-user 500,5000,20000
+    python -m benchmarks.load_test --base-url http://localhost:8000 --rate 50 --duration 60 \\
+        --mix login=1,dashboard=4,recommendations=3,transactions=3,upload=0.2 --output load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.seed_load import DEFAULT_PASSWORD, user_email
+
+DEFAULT_MIX = "login=1,dashboard=4,recommendations=3,transactions=3,upload=0.2"
+# Routes whose scaling with per-user history the summary reports
+SCALING_ROUTES = ("dashboard", "recommendations")
+ERROR_RATE_LIMIT = 0.01
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        route, _, weight = part.partition("=")
+        route = route.strip()
+        if route not in ROUTES:
+            raise SystemExit(f"Unknown route in --mix: {route} (choose from {', '.join(ROUTES)})")
+        weights[route] = float(weight or 1)
+    return {route: weight for route, weight in weights.items() if weight > 0}
+
+
+async def login(client: httpx.AsyncClient, email: str, args) -> httpx.Response:
+    return await client.post("/api/auth/login", data={"username": email, "password": args.password})
+
+
+async def dashboard(client: httpx.AsyncClient, headers: Dict, args) -> httpx.Response:
+    return await client.get("/api/transactions/dashboard", params={"months": args.months}, headers=headers)
+
+
+async def recommendations(client: httpx.AsyncClient, headers: Dict, args) -> httpx.Response:
+    return await client.get("/api/recommendations/", headers=headers)
+
+
+async def transactions(client: httpx.AsyncClient, headers: Dict, args) -> httpx.Response:
+    return await client.get("/api/transactions/", params={"limit": 50}, headers=headers)
+
+
+async def upload(client: httpx.AsyncClient, headers: Dict, args) -> httpx.Response:
+    # A unique trailing comment per request keeps the duplicate check from answering 409
+    args.uploads += 1
+    content = args.statement_pdf + f"% upload {args.uploads} {time.time()}\n".encode()
+    return await client.post("/api/statements/upload", headers=headers,
+                             files={"file": ("estado_de_cuenta.pdf", content, "application/pdf")})
+
+
+ROUTES = {
+    "login": login,
+    "dashboard": dashboard,
+    "recommendations": recommendations,
+    "transactions": transactions,
+    "upload": upload,
+}
+
+
+def percentile(latencies: List[float], p: float) -> float:
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p))] if latencies else 0.0
+
+
+def summarize(samples: List[Tuple[float, Optional[int]]], duration: float) -> Dict:
+    """samples are (seconds, status code or None for a timeout/connection error)"""
+    latencies = sorted(seconds * 1000 for seconds, _ in samples)
+    errors = Counter(str(status) if status else "timeout" for _, status in samples if not status or status >= 400)
+    return {
+        "requests": len(samples),
+        "rate": round(len(samples) / duration, 2),
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "p99_ms": round(percentile(latencies, 0.99), 1),
+        "max_ms": round(latencies[-1], 1) if latencies else 0.0,
+        "errors": sum(errors.values()),
+        "error_rate": round(sum(errors.values()) / len(samples), 4) if samples else 0.0,
+        "error_statuses": dict(errors),
+    }
+
+
+async def run_tier(client: httpx.AsyncClient, rows: int, mix: Dict[str, float], args) -> Dict[str, Dict]:
+    emails = [user_email(rows, index) for index in range(args.users)]
+    headers = {}
+    for email in emails:
+        response = await login(client, email, args)
+        if response.status_code != 200:
+            raise SystemExit(f"Login failed for {email} ({response.status_code}), seed with benchmarks.seed_load first")
+        headers[email] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    rng = random.Random(f"{args.seed}-{rows}")
+    routes, weights = list(mix), list(mix.values())
+    samples: Dict[str, List[Tuple[float, Optional[int]]]] = defaultdict(list)
+
+    async def send(route: str, email: str, scheduled: float) -> None:
+        status = None
+        try:
+            target = email if route == "login" else headers[email]
+            response = await asyncio.wait_for(ROUTES[route](client, target, args), args.timeout)
+            status = response.status_code
+        except (asyncio.TimeoutError, httpx.HTTPError):
+            pass
+        samples[route].append((time.perf_counter() - scheduled, status))
+
+    tasks = []
+    started = time.perf_counter()
+    scheduled = started
+    while True:
+        scheduled += rng.expovariate(args.rate)
+        if scheduled - started >= args.duration:
+            break
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        route = rng.choices(routes, weights)[0]
+        tasks.append(asyncio.create_task(send(route, rng.choice(emails), scheduled)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    return {route: summarize(samples[route], elapsed) for route in routes if samples[route]}
+
+
+def print_tier(rows: int, results: Dict[str, Dict]) -> None:
+    print(f"\n{rows} transactions/user")
+    print(f"  {'route':<16} {'requests':>8} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'errors':>7}  statuses")
+    for route, stats in results.items():
+        print(f"  {route:<16} {stats['requests']:>8} {stats['rate']:>7.1f} {stats['p50_ms']:>8.1f} "
+              f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f} "
+              f"{stats['error_rate']:>7.1%}  {stats['error_statuses'] or ''}")
+
+
+def print_scaling(tiers: Dict[int, Dict[str, Dict]], slo_ms: float) -> None:
+    print(f"\np95 by transactions/user (SLO {slo_ms:g} ms, {ERROR_RATE_LIMIT:.0%} errors)")
+    print(f"  {'route':<16} " + " ".join(f"{rows:>10}" for rows in tiers) + "  falls over at")
+    for route in SCALING_ROUTES:
+        cells = []
+        falls_over = None
+        for rows, results in tiers.items():
+            stats = results.get(route)
+            if stats is None:
+                cells.append(f"{'-':>10}")
+                continue
+            cells.append(f"{stats['p95_ms']:>10.1f}")
+            if falls_over is None and (stats["p95_ms"] > slo_ms or stats["error_rate"] > ERROR_RATE_LIMIT):
+                falls_over = rows
+        print(f"  {route:<16} " + " ".join(cells) + f"  {falls_over if falls_over is not None else '-'}")
+
+
+async def run(args) -> Dict:
+    mix = parse_mix(args.mix)
+    tiers = [int(rows) for rows in args.rows_per_user.split(",")]
+    if "upload" in mix:
+        from benchmarks.pdf_generator import generate_statement
+        args.statement_pdf, _ = generate_statement(40, seed=args.seed, certificate_pages=0)
+    args.uploads = 0
+
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=None, limits=limits)
+        lifespan = None
+    else:
+        from app.main import app
+        # Unhandled app errors come back as 500s; the lifespan starts the ingestion queue for uploads
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        client = httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None)
+        lifespan = app.router.lifespan_context(app)
+        await lifespan.__aenter__()
+
+    results = {}
+    try:
+        async with client:
+            for rows in tiers:
+                results[rows] = await run_tier(client, rows, mix, args)
+                print_tier(rows, results[rows])
+    finally:
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+    print_scaling(results, args.slo_ms)
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--base-url", help="running server to test; defaults to the app in this process")
+    arg_parser.add_argument("--database-url", help="database of the in-process app, defaults to DATABASE_URL")
+    arg_parser.add_argument("--users", type=int, default=10, help="Seeded users per tier")
+    arg_parser.add_argument("--rows-per-user", default="500,5000,20000", help="Seeded tiers to test, in order")
+    arg_parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    arg_parser.add_argument("--mix", default=DEFAULT_MIX, help="route=weight pairs")
+    arg_parser.add_argument("--rate", type=float, default=20.0, help="Requests per second (Poisson arrivals)")
+    arg_parser.add_argument("--duration", type=float, default=30.0, help="Seconds of traffic per tier")
+    arg_parser.add_argument("--months", type=int, default=6, help="Dashboard months parameter")
+    arg_parser.add_argument("--connections", type=int, default=100, help="Client connection limit (--base-url)")
+    arg_parser.add_argument("--timeout", type=float, default=30.0, help="Seconds before a request counts as failed")
+    arg_parser.add_argument("--slo-ms", type=float, default=500.0)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--output", help="Write per-tier, per-route results as JSON")
+    args = arg_parser.parse_args()
+
+    # app.database builds its engine from DATABASE_URL at import time
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    print(f"{args.rate:g} req/s for {args.duration:g}s per tier, mix {args.mix}, "
+          f"{args.users} users per tier, target {args.base_url or 'in-process app'}")
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "config": {key: value for key, value in vars(args).items() if key not in ("statement_pdf", "uploads")},
+                "tiers": results,
+            }, f, indent=2)
+        print(f"\nresults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Local OpenAI-compatible chat completions server for testing AI categorization.
+
+Answers `POST /v1/chat/completions` by categorizing the quoted descriptions of
+the prompt with the keyword categorizer. It replies in the JSON format that
+AICategoryScheduler asks for, or with a bare category for single-transaction
+prompts. Latency, a requests-per-minute limit (429 with Retry-After), server
+errors and malformed replies can be injected. Run from the backend directory:
+
+    python -m benchmarks.mock_openai --port 8765 --latency-ms 300 --rpm 120
+
+then point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8765/v1 and any
+OPENAI_API_KEY.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from collections import deque
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from app.services.keyword_categorizer import get_keyword_categorizer
+
+NUMBERED_LINE_RE = re.compile(r'^\d+\.\s+("(?:[^"\\]|\\.)*")', re.MULTILINE)
+SINGLE_DESCRIPTION_RE = re.compile(r'Transaction description:\s*"(.*)"')
+
+
+def create_app(latency_ms: float = 0.0, rpm: float = 0.0, error_rate: float = 0.0,
+               garbage_rate: float = 0.0, seed: int = 42) -> FastAPI:
+    """Mock server; `app.state.stats` counts requests, 429s, 500s and malformed replies"""
+    app = FastAPI(title="Mock OpenAI")
+    rng = random.Random(seed)
+    recent = deque()
+    app.state.stats = {"requests": 0, "completions": 0, "rate_limited": 0, "errors": 0, "garbage": 0, "max_in_flight": 0}
+    in_flight = [0]
+
+    def error(status: int, message: str, code: str, headers=None) -> JSONResponse:
+        body = {"error": {"message": message, "type": code, "code": code}}
+        return JSONResponse(body, status_code=status, headers=headers)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        stats = app.state.stats
+        stats["requests"] += 1
+        body = await request.json()
+        prompt = body["messages"][-1]["content"]
+
+        now = time.monotonic()
+        while recent and now - recent[0] > 60:
+            recent.popleft()
+        if rpm and len(recent) >= rpm:
+            stats["rate_limited"] += 1
+            retry_after = max(0.05, 60 - (now - recent[0]))
+            return error(429, "Rate limit reached for requests", "rate_limit_exceeded",
+                         headers={"retry-after": f"{retry_after:.2f}"})
+        recent.append(now)
+
+        in_flight[0] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], in_flight[0])
+        try:
+            await asyncio.sleep(latency_ms / 1000)
+        finally:
+            in_flight[0] -= 1
+        if rng.random() < error_rate:
+            stats["errors"] += 1
+            return error(500, "The server had an error while processing your request", "server_error")
+
+        categorizer = get_keyword_categorizer()
+        descriptions = [json.loads(quoted) for quoted in NUMBERED_LINE_RE.findall(prompt)]
+        if descriptions:
+            content = json.dumps({"categories": [categorizer.categorize(d) for d in descriptions]})
+        else:
+            match = SINGLE_DESCRIPTION_RE.search(prompt)
+            content = categorizer.categorize(match.group(1) if match else "")
+        if rng.random() < garbage_rate:
+            stats["garbage"] += 1
+            content = content[: len(content) // 2]
+        stats["completions"] += 1
+        return {
+            "id": f"chatcmpl-mock-{stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(prompt) + len(content)) // 4},
+        }
+
+    return app
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--latency-ms", type=float, default=300.0)
+    arg_parser.add_argument("--rpm", type=float, default=0.0, help="Requests per minute before answering 429 (0 = unlimited)")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 500")
+    arg_parser.add_argument("--garbage-rate", type=float, default=0.0, help="Share of replies cut in half (invalid JSON)")
+    args = arg_parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(create_app(args.latency_ms, args.rpm, args.error_rate, args.garbage_rate),
+                host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
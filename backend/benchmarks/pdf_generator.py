@@ -0,0 +1,244 @@
+"""Synthetic BBVA-style statement PDFs with ground truth, for parser benchmarks.
+
+Each statement has a summary page, movements pages laid out like BBVA's table
+(operation and settlement dates, description, right-aligned CARGOS, ABONOS and
+two balance columns, reference lines under some movements) and trailing CFDI
+certificate pages. Credits include deposits and payroll lines with no "recibido"
+in the description, which flat-text parsing can only guess at. Movements per
+page, noise lines between movements, certificate pages and page footers are
+configurable; the same seed always gives the same bytes. Every PDF is written
+with a JSON file of the expected transactions next to it. Run from the backend
+directory:
+
+    python -m benchmarks.pdf_generator --out fixtures --statements 5 --rows 120
+    python -m benchmarks.pdf_generator --out fixtures --pages 20 --rows-per-page 30 --noise 3 --certificates 2
+"""
+import argparse
+import json
+import os
+import random
+from datetime import date
+from typing import Dict, List, Set, Tuple
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+FONT_SIZE = 7
+LINE_HEIGHT = 11
+ROWS_PER_PAGE = 35
+
+# Right edges of the amount columns (amounts and their headers are right-aligned)
+COLUMNS = [("CARGOS", 380), ("ABONOS", 445), ("OPERACION", 515), ("LIQUIDACION", 585)]
+MONTHS = ["ENE", "FEB", "MAR", "ABR", "MAY", "JUN", "JUL", "AGO", "SEP", "OCT", "NOV", "DIC"]
+
+CHARGES = [
+    "OXXO ROMA NORTE", "UBER EATS", "SPEI ENVIADO NU MEXICO", "STARBUCKS REFORMA", "CINEPOLIS PLAZA",
+    "NETFLIX MX", "GASOLINERA PEMEX", "LIVERPOOL SANTA FE", "FARMACIA GUADALAJARA", "TELCEL PAGO",
+    "PAGO TARJETA DE CREDITO", "RETIRO CAJERO AUTOMATICO",
+]
+CREDITS = [
+    "SPEI RECIBIDO BANORTE", "DEPOSITO EN EFECTIVO", "ABONO NOMINA EMPRESA SA", "DEVOLUCION AMAZON MX",
+    "TRASPASO DE TERCEROS", "PAGO DE INTERESES",
+]
+
+# Non-transaction lines that turn up between movements: letterhead, account
+# data, reference codes and notices (no amounts, no "total" that would end the section)
+NOISE_LINES = [
+    "BBVA MEXICO, S.A., INSTITUCION DE BANCA MULTIPLE", "No. de Cuenta 0123456789", "JUAN PEREZ LOPEZ",
+    "RFC: BBA830831LJ2", "MBAN01002510030092914825", "Estimado Cliente, consulte su estado de cuenta en bbva.mx",
+    "Av. Paseo de la Reforma 510 Col. Juarez CP 06600", "Clave de rastreo BNET01002510030012345678",
+]
+FOOTER_LINE = "La GAT Real es el rendimiento que obtendría después de descontar la inflación estimada"
+CERTIFICATE_TITLES = [
+    "Sello digital del CFDI:", "Sello del SAT:",
+    "Cadena original del complemento de certificación digital del SAT:",
+]
+BASE64_CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+CERTIFICATE_LINE_CHARS = 96
+
+# Helvetica advance widths (1/1000 em) for the characters amounts are made of
+DIGIT_WIDTHS = {",": 278, ".": 278, "-": 333}
+
+
+def text_width(text: str, size: float = FONT_SIZE) -> float:
+    """Width of an amount string in Helvetica (digits are 556 units wide)"""
+    return sum(DIGIT_WIDTHS.get(char, 556) for char in text) * size / 1000
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(pages: List[List[Tuple[float, float, str]]]) -> bytes:
+    """Minimal PDF: one Helvetica content stream per page of (x, y, text) runs"""
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    pages_id = add(b"")
+    kids = []
+    for runs in pages:
+        ops = [f"BT /F1 {FONT_SIZE} Tf"]
+        ops += [f"1 0 0 1 {x:.2f} {y:.2f} Tm ({_escape(text)}) Tj" for x, y, text in runs]
+        ops.append("ET")
+        stream = "\n".join(ops).encode("cp1252")
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(add(
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {content} 0 R >>".encode()
+        ))
+    objects[pages_id - 1] = (
+        f"<< /Type /Pages /Kids [{' '.join(f'{kid} 0 R' for kid in kids)}] /Count {len(kids)} >>".encode()
+    )
+    catalog = add(f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode())
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root {catalog} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def _amount(value: float) -> str:
+    return f"{value:,.2f}"
+
+
+def _certificate_page(rng: random.Random) -> List[Tuple[float, float, str]]:
+    """A CFDI page: stamp titles and long base64 lines, nothing a parser should read"""
+    y = PAGE_HEIGHT - 40
+    lines_per_title = int((y - 60) / LINE_HEIGHT) // len(CERTIFICATE_TITLES) - 1
+    runs = []
+    for title in CERTIFICATE_TITLES:
+        runs.append((40, y, title))
+        y -= LINE_HEIGHT
+        for _ in range(lines_per_title):
+            runs.append((40, y, "".join(rng.choice(BASE64_CHARS) for _ in range(CERTIFICATE_LINE_CHARS))))
+            y -= LINE_HEIGHT
+    return runs
+
+
+def generate_statement(rows: int, seed: int = 0, year: int = 2025, month: int = 10,
+                       rows_per_page: int = ROWS_PER_PAGE, noise_per_page: int = 0,
+                       certificate_pages: int = 1, footers: bool = True) -> Tuple[bytes, List[Dict]]:
+    """A statement PDF and its expected transactions ({date, description, amount, transaction_type})
+
+    Movements pages hold at most `rows_per_page` movements (fewer when reference
+    lines fill the page first) and `noise_per_page` non-transaction lines at
+    random positions between them. `footers` puts a page number and the legal
+    GAT line at the bottom of every page, `certificate_pages` CFDI pages follow
+    the movements. Noise comes from its own random stream, so the movements of
+    a seed are the same whatever the noise settings.
+    """
+    rng = random.Random(seed)
+    noise_rng = random.Random(f"noise-{seed}")
+    rows_per_page = max(1, rows_per_page)
+    month_abbr = MONTHS[month - 1]
+    summary = [
+        "BBVA MEXICO, S.A., INSTITUCION DE BANCA MULTIPLE, GRUPO FINANCIERO BBVA MEXICO",
+        f"Periodo DEL 01/{month:02d}/{year} AL 28/{month:02d}/{year}",
+        "No. de Cuenta 0123456789", "No. de Cliente 12345678",
+        "Saldo Anterior 25,000.00", "Estimado Cliente, le informamos sobre su estado de cuenta",
+    ]
+    pages = [[(40, PAGE_HEIGHT - 40 - i * LINE_HEIGHT, line) for i, line in enumerate(summary)]]
+
+    header = [(40, "FECHA"), (72, "OPER"), (98, "LIQ"), (125, "DESCRIPCION")]
+    header += [(right - text_width(name), name) for name, right in COLUMNS]
+    expected = []
+    balance = 25000.0
+    runs: List[Tuple[float, float, str]] = []
+    y = 0.0
+    page_rows = 0
+    noise_slots: Set[int] = set()
+
+    def new_page(first: bool) -> None:
+        nonlocal runs, y, page_rows, noise_slots
+        runs = []
+        pages.append(runs)
+        y = PAGE_HEIGHT - 40
+        page_rows = 0
+        noise_slots = set(noise_rng.sample(range(rows_per_page), min(noise_per_page, rows_per_page)))
+        if first:
+            runs.append((40, y, "Detalle de Movimientos Realizados"))
+            y -= LINE_HEIGHT
+        for x, text in header:
+            runs.append((x, y, text))
+        y -= LINE_HEIGHT
+
+    new_page(first=True)
+    days = sorted(rng.randint(1, 28) for _ in range(rows))
+    for day in days:
+        if y < 60 or page_rows >= rows_per_page:
+            new_page(first=False)
+        if page_rows in noise_slots:
+            runs.append((125, y, noise_rng.choice(NOISE_LINES)))
+            y -= LINE_HEIGHT
+        page_rows += 1
+        credit = rng.random() < 0.3
+        description = rng.choice(CREDITS if credit else CHARGES)
+        value = round(rng.uniform(20, 15000 if credit else 3000), 2)
+        balance += value if credit else -value
+        operation_date = f"{day:02d}/{month_abbr}"
+        runs.append((40, y, operation_date))
+        runs.append((72, y, operation_date))
+        runs.append((125, y, description))
+        amount_column = COLUMNS[1][1] if credit else COLUMNS[0][1]
+        for right, text in ((amount_column, _amount(value)), (COLUMNS[2][1], _amount(balance)),
+                            (COLUMNS[3][1], _amount(balance))):
+            runs.append((right - text_width(text), y, text))
+        y -= LINE_HEIGHT
+        expected.append({
+            "date": date(year, month, day).isoformat(),
+            "description": description,
+            "amount": value,
+            "transaction_type": "income" if credit else "expense",
+        })
+        if rng.random() < 0.5:
+            runs.append((125, y, f"Referencia {rng.randint(10 ** 9, 10 ** 10 - 1)} AUT {rng.randint(100000, 999999)}"))
+            y -= LINE_HEIGHT
+
+    runs.append((40, y - LINE_HEIGHT, "Total de Movimientos"))
+    for _ in range(certificate_pages):
+        pages.append(_certificate_page(noise_rng))
+    if footers:
+        for number, page_runs in enumerate(pages, start=1):
+            page_runs.append((40, 45, FOOTER_LINE))
+            page_runs.append((280, 30, f"Página {number} de {len(pages)}"))
+    return write_pdf(pages), expected
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--out", default="fixtures")
+    arg_parser.add_argument("--statements", type=int, default=5)
+    arg_parser.add_argument("--rows", type=int, default=120, help="Movements per statement")
+    arg_parser.add_argument("--pages", type=int, help="Movements pages per statement (overrides --rows)")
+    arg_parser.add_argument("--rows-per-page", type=int, default=ROWS_PER_PAGE)
+    arg_parser.add_argument("--noise", type=int, default=0, help="Noise lines per movements page")
+    arg_parser.add_argument("--certificates", type=int, default=1, help="Trailing CFDI pages")
+    arg_parser.add_argument("--no-footers", action="store_true")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+    rows = args.pages * args.rows_per_page if args.pages else args.rows
+
+    os.makedirs(args.out, exist_ok=True)
+    for i in range(args.statements):
+        pdf_content, expected = generate_statement(
+            rows, seed=args.seed + i, rows_per_page=args.rows_per_page, noise_per_page=args.noise,
+            certificate_pages=args.certificates, footers=not args.no_footers,
+        )
+        path = os.path.join(args.out, f"statement_{i:03d}.pdf")
+        with open(path, "wb") as f:
+            f.write(pdf_content)
+        with open(path[:-4] + ".json", "w") as f:
+            json.dump(expected, f, indent=1)
+        print(f"{path}: {len(expected)} movements")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Baseline benchmark suite: parser, categorizer and upload timings as JSON.
+
+Generates a deterministic BBVA-style statement (benchmarks/pdf_generator.py) and
+times the stages every parser optimization is measured against:
+
+- extract_text: PDFParser.extract_text, pdfplumber over every page
+- extract_transactions_text / extract_transactions_layout: PDFParser.extract_transactions
+  in each PDF_EXTRACT_MODE, with accuracy against the ground truth
+- categorize_batch: AICategorizer.categorize_batch (keywords) with a cold merchant memo
+- upload: POST /api/statements/upload?wait=true end to end (SQLite, in-process ingestion,
+  no parse cache)
+
+Each benchmark runs once to warm up, then `--repeat` times; best, median and mean
+are written with the generator settings and environment to `--output`. With
+`--compare`, medians are checked against an earlier results file and the run
+exits with status 1 when one is slower by more than `--threshold`, or when a
+benchmark's output (transactions found, exact matches) changed. Run from the
+backend directory:
+
+    python -m benchmarks.suite --output results/baseline.json
+    python -m benchmarks.suite --compare results/baseline.json --output results/current.json
+    python -m benchmarks.suite --current results/current.json --compare results/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+# Keys in a benchmark's "output" that must not change between runs of the same fixture
+OUTPUT_KEYS = ("pages", "transactions", "exact", "categorized", "status")
+
+
+def measure(func: Callable[[], object], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict:
+    """Warm up once, then time `repeat` calls of func (setup runs untimed before each)"""
+    if setup:
+        setup()
+    func()
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return {
+        "best_ms": round(min(times), 3),
+        "median_ms": round(statistics.median(times), 3),
+        "mean_ms": round(statistics.mean(times), 3),
+        "runs": len(times),
+    }
+
+
+def bench_extract_text(pdf_content: bytes, expected: List[Dict], repeat: int) -> Dict:
+    from app.services.pdf_parser import PDFParser
+
+    parser = PDFParser(workers=1)
+    result = measure(lambda: parser.extract_text(pdf_content), repeat)
+    result["output"] = {"pages": parser.page_count}
+    return result
+
+
+def _bench_extract_transactions(mode: str, pdf_content: bytes, expected: List[Dict], repeat: int) -> Dict:
+    from app.services.pdf_parser import PDFParser
+    from benchmarks.bench_layout_mode import score
+
+    parser = PDFParser(workers=1, mode=mode)
+    result = measure(lambda: parser.extract_transactions(pdf_content), repeat)
+    accuracy = score(parser.extract_transactions(pdf_content), expected)
+    result["output"] = {"transactions": accuracy["parsed"], "exact": accuracy["exact"]}
+    return result
+
+
+def bench_extract_transactions_text(pdf_content: bytes, expected: List[Dict], repeat: int) -> Dict:
+    return _bench_extract_transactions("text", pdf_content, expected, repeat)
+
+
+def bench_extract_transactions_layout(pdf_content: bytes, expected: List[Dict], repeat: int) -> Dict:
+    return _bench_extract_transactions("layout", pdf_content, expected, repeat)
+
+
+def bench_categorize_batch(pdf_content: bytes, expected: List[Dict], repeat: int) -> Dict:
+    from app.services import ai_categorizer
+
+    categorizer = ai_categorizer.AICategorizer(use_openai=False)
+
+    def reset_memo():
+        ai_categorizer._category_memo = None
+
+    result = measure(lambda: categorizer.categorize_batch([dict(row) for row in expected]), repeat, setup=reset_memo)
+    categorized = categorizer.categorize_batch([dict(row) for row in expected])
+    result["output"] = {"categorized": sum(1 for row in categorized if row.get("category"))}
+    return result
+
+
+def bench_upload(pdf_content: bytes, expected: List[Dict], repeat: int) -> Dict:
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        credentials = {"email": "bench@example.com", "password": "benchmark-password"}
+        client.post("/api/auth/register", json=credentials)
+        login = client.post("/api/auth/login", data={
+            "username": credentials["email"], "password": credentials["password"],
+        })
+        login.raise_for_status()
+        token = login.json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        uploads = iter(range(repeat + 1))
+        statement_ids = []
+
+        def upload():
+            # A trailing comment per run keeps the content hash unique (no duplicate rejection)
+            content = pdf_content + f"% run {next(uploads)}\n".encode()
+            response = client.post("/api/statements/upload", params={"wait": "true"}, headers=headers,
+                                   files={"file": ("statement.pdf", content, "application/pdf")})
+            response.raise_for_status()
+            statement_ids.append(response.json()["id"])
+
+        result = measure(upload, repeat)
+        last = client.get(f"/api/statements/{statement_ids[-1]}/status", headers=headers).json()
+    result["output"] = {"status": last["status"], "transactions": last["transactions_count"]}
+    return result
+
+
+BENCHMARKS: Dict[str, Callable[[bytes, List[Dict], int], Dict]] = {
+    "extract_text": bench_extract_text,
+    "extract_transactions_text": bench_extract_transactions_text,
+    "extract_transactions_layout": bench_extract_transactions_layout,
+    "categorize_batch": bench_categorize_batch,
+    "upload": bench_upload,
+}
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "git_commit": commit,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> bool:
+    """Print current vs baseline medians, returns True when nothing regressed"""
+    ok = True
+    if current.get("fixture") != baseline.get("fixture"):
+        print("warning: fixture settings differ from the baseline, timings are not comparable")
+    print(f"\n{'benchmark':<30} {'baseline ms':>12} {'current ms':>11} {'change':>8}  verdict")
+    for name, result in current["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if before is None:
+            print(f"{name:<30} {'-':>12} {result['median_ms']:>11.2f} {'-':>8}  new")
+            continue
+        change = result["median_ms"] / before["median_ms"] - 1 if before["median_ms"] else 0.0
+        verdict = "ok"
+        if change > threshold:
+            verdict = "REGRESSION"
+            ok = False
+        elif change < -threshold:
+            verdict = "faster"
+        changed = [key for key in OUTPUT_KEYS
+                   if key in before.get("output", {}) and before["output"][key] != result.get("output", {}).get(key)]
+        if changed:
+            note = f"OUTPUT CHANGED ({', '.join(changed)})"
+            verdict = note if verdict == "ok" else f"{verdict}, {note}"
+            ok = False
+        print(f"{name:<30} {before['median_ms']:>12.2f} {result['median_ms']:>11.2f} {change:>+8.1%}  {verdict}")
+    return ok
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--pages", type=int, default=10, help="Movements pages in the statement")
+    arg_parser.add_argument("--rows-per-page", type=int, default=35)
+    arg_parser.add_argument("--noise", type=int, default=2, help="Noise lines per movements page")
+    arg_parser.add_argument("--certificates", type=int, default=1, help="Trailing CFDI pages")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Run only these benchmarks")
+    arg_parser.add_argument("--output", help="Write results JSON here")
+    arg_parser.add_argument("--current", help="Compare this results file instead of running the suite")
+    arg_parser.add_argument("--compare", help="Baseline results JSON to check for regressions")
+    arg_parser.add_argument("--threshold", type=float, default=0.10, help="Allowed median slowdown (0.10 = 10%%)")
+    args = arg_parser.parse_args()
+
+    if args.current:
+        with open(args.current) as f:
+            results = json.load(f)
+    else:
+        # Set before the app is imported: throwaway database, parsing in this process, no cached parses
+        database_dir = tempfile.mkdtemp(prefix="finaice_bench_")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(database_dir, 'bench.db')}"
+        os.environ["INGESTION_BACKEND"] = "inprocess"
+        os.environ["PARSE_CACHE_BACKEND"] = "none"
+        os.environ["AI_CATEGORIZATION"] = "false"
+        from benchmarks.pdf_generator import generate_statement
+
+        fixture = {
+            "pages": args.pages, "rows_per_page": args.rows_per_page, "noise_per_page": args.noise,
+            "certificate_pages": args.certificates, "seed": args.seed,
+        }
+        pdf_content, expected = generate_statement(
+            args.pages * args.rows_per_page, seed=args.seed, rows_per_page=args.rows_per_page,
+            noise_per_page=args.noise, certificate_pages=args.certificates,
+        )
+        fixture["movements"] = len(expected)
+        fixture["pdf_bytes"] = len(pdf_content)
+        results = {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "environment": environment(),
+            "fixture": fixture,
+            "repeat": args.repeat,
+            "benchmarks": {},
+        }
+        print(f"statement: {len(expected)} movements, {len(pdf_content) / 1024:.0f} KiB, {args.repeat} runs each")
+        print(f"{'benchmark':<30} {'best ms':>10} {'median ms':>10} {'mean ms':>10}  output")
+        for name in args.only or BENCHMARKS:
+            result = BENCHMARKS[name](pdf_content, expected, args.repeat)
+            results["benchmarks"][name] = result
+            print(f"{name:<30} {result['best_ms']:>10.2f} {result['median_ms']:>10.2f} {result['mean_ms']:>10.2f}  "
+                  f"{json.dumps(result.get('output', {}))}")
+
+        if args.output:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"\nresults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()